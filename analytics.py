@@ -0,0 +1,215 @@
+# analytics.py
+import itertools
+from array import array
+from datetime import date
+
+from history import estimate_1rm, estimate_1rm_brzycki
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # Pure-Python fallback below, e.g. on builds without the numpy recipe
+
+# Logs averaged by the rolling metrics
+ROLLING_WINDOW = 5
+
+
+def date_ordinal(date_str):
+    try:
+        return date.fromisoformat(date_str).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+def date_str(ordinal):
+    return date.fromordinal(ordinal).isoformat() if ordinal > 0 else ''
+
+def _week_start(ordinal):
+    # Ordinal 1 (0001-01-01) is a Monday, so weeks run Monday..Sunday
+    return ordinal - (ordinal - 1) % 7
+
+
+# Every set of the history as flat columns, one row per log plus one row per set. The columns
+# are typed arrays, so NumPy reads them in place; log_sets holds offsets with one trailing entry,
+# so set_weight[log_sets[i]:log_sets[i + 1]] are the weights of log i.
+class SetTable:
+    def __init__(self):
+        self.exercise_ids = []
+        self.exercise_index = {}
+        self.log_exercise = array('i')  # index into exercise_ids
+        self.log_date = array('i')      # date ordinal
+        self.log_sets = array('I', [0])
+        self.set_weight = array('d')
+        self.set_reps = array('i')
+
+    def __len__(self):
+        return len(self.log_exercise)
+
+    def add_log(self, exercise_id, ordinal, sets):
+        ex_idx = self.exercise_index.get(exercise_id)
+        if ex_idx is None:
+            ex_idx = self.exercise_index[exercise_id] = len(self.exercise_ids)
+            self.exercise_ids.append(exercise_id)
+        self.log_exercise.append(ex_idx)
+        self.log_date.append(ordinal)
+        for weight, reps in sets:
+            self.set_weight.append(weight)
+            self.set_reps.append(reps)
+        self.log_sets.append(len(self.set_weight))
+
+    def add_sessions(self, sessions):
+        for session in sessions:
+            ordinal = date_ordinal(session.get('date'))
+            for log in session.get('exercises', []):
+                self.add_log(log['exercise_id'], ordinal,
+                             ((s.get('weight', 0), s.get('reps', 0)) for s in log.get('sets', [])))
+
+
+# --- Summary ---
+
+def summarize(table, window=ROLLING_WINDOW):
+    # Progression metrics of every exercise in one pass:
+    # {exercise id: {'logs', 'sets', 'volume', 'avg_weight', 'top_weight', 'e1rm_epley',
+    #  'e1rm_brzycki', 'last_date', 'last_volume', 'rolling_volume', 'rolling_e1rm',
+    #  'week_start', 'week_volume', 'week_delta'}}
+    # Rolling values average the last 'window' logs; the week values are the exercise's latest
+    # Monday-based week and its change over the calendar week before it.
+    if np is not None:
+        return _summarize_numpy(table, window)
+    return _summarize_python(table, window)
+
+def _summary(logs, sets, volume, sum_weight, top_weight, epley, brzycki, last_date, last_volume,
+             rolling_volume, rolling_e1rm, week_start, week_volume, week_delta):
+    return {
+        'logs': logs,
+        'sets': sets,
+        'volume': round(volume, 2),
+        'avg_weight': round(sum_weight / sets, 2),
+        'top_weight': round(top_weight, 3),
+        'e1rm_epley': round(epley, 2),
+        'e1rm_brzycki': round(brzycki, 2),
+        'last_date': date_str(last_date),
+        'last_volume': round(last_volume, 2),
+        'rolling_volume': round(rolling_volume, 2),
+        'rolling_e1rm': round(rolling_e1rm, 2),
+        'week_start': date_str(week_start),
+        'week_volume': round(week_volume, 2),
+        'week_delta': round(week_delta, 2),
+    }
+
+
+def _summarize_python(table, window):
+    # Per-log aggregates, grouped by exercise; logs without sets are left out
+    by_exercise = {}
+    offsets, weights, reps = table.log_sets, table.set_weight, table.set_reps
+    for i in range(len(table)):
+        start, end = offsets[i], offsets[i + 1]
+        if start == end: continue
+        w, r = weights[start:end], reps[start:end]
+        by_exercise.setdefault(table.log_exercise[i], []).append((
+            table.log_date[i],
+            sum(a * b for a, b in zip(w, r)),
+            sum(w),
+            end - start,
+            max(w),
+            max(estimate_1rm(a, b) for a, b in zip(w, r)),
+            max(estimate_1rm_brzycki(a, b) for a, b in zip(w, r)),
+        ))
+
+    result = {}
+    for ex_idx, logs in by_exercise.items():
+        logs.sort(key=lambda log: log[0]) # Stable, same-day logs keep their order
+        recent = logs[-window:]
+        weeks = [(week, sum(log[1] for log in group))
+                 for week, group in itertools.groupby(logs, key=lambda log: _week_start(log[0]))]
+        week_start, week_volume = weeks[-1]
+        previous = weeks[-2][1] if len(weeks) > 1 and weeks[-2][0] == week_start - 7 else 0
+        result[table.exercise_ids[ex_idx]] = _summary(
+            len(logs),
+            sum(log[3] for log in logs),
+            sum(log[1] for log in logs),
+            sum(log[2] for log in logs),
+            max(log[4] for log in logs),
+            max(log[5] for log in logs),
+            max(log[6] for log in logs),
+            logs[-1][0],
+            logs[-1][1],
+            sum(log[1] for log in recent) / len(recent),
+            sum(log[5] for log in recent) / len(recent),
+            week_start,
+            week_volume,
+            week_volume - previous,
+        )
+    return result
+
+
+def _summarize_numpy(table, window):
+    offsets = np.asarray(table.log_sets, dtype=np.int64)
+    counts = np.diff(offsets)
+    keep = counts > 0
+    if not keep.any():
+        return {}
+    starts, counts = offsets[:-1][keep], counts[keep]
+    weights = np.asarray(table.set_weight)
+    reps = np.asarray(table.set_reps).astype(np.float64)
+
+    # Per-log aggregates; the sets of non-empty logs cover the set columns contiguously, so
+    # ufunc.reduceat over the log start offsets reduces each log's sets in one call
+    volume = np.add.reduceat(weights * reps, starts)
+    sum_weight = np.add.reduceat(weights, starts)
+    top_weight = np.maximum.reduceat(weights, starts)
+    multi = reps > 1
+    epley = np.maximum.reduceat(np.where(multi, weights * (1 + reps / 30), weights), starts)
+    brzycki = np.where(reps < 37, weights * 36 / np.maximum(37 - reps, 1), 0)
+    brzycki = np.maximum.reduceat(np.where(multi, brzycki, weights), starts)
+
+    # Group by exercise, date ordered within each group (lexsort is stable)
+    exercise = np.asarray(table.log_exercise)[keep]
+    dates = np.asarray(table.log_date)[keep]
+    order = np.lexsort((dates, exercise))
+    exercise, dates = exercise[order], dates[order]
+    volume, sum_weight, counts = volume[order], sum_weight[order], counts[order]
+    top_weight, epley, brzycki = top_weight[order], epley[order], brzycki[order]
+
+    n = len(exercise)
+    group_starts = np.flatnonzero(np.r_[True, exercise[1:] != exercise[:-1]])
+    group_ends = np.r_[group_starts[1:], n]
+    last = group_ends - 1
+
+    # Rolling means over each group's last 'window' logs, from prefix sums
+    window_starts = np.maximum(group_ends - window, group_starts)
+    window_sizes = group_ends - window_starts
+    volume_sums = np.r_[0, np.cumsum(volume)]
+    epley_sums = np.r_[0, np.cumsum(epley)]
+    rolling_volume = (volume_sums[group_ends] - volume_sums[window_starts]) / window_sizes
+    rolling_e1rm = (epley_sums[group_ends] - epley_sums[window_starts]) / window_sizes
+
+    # Weekly volume per exercise; rows are (exercise, week) ordered, so the previous row is the
+    # previous week only when it belongs to the same exercise and is exactly 7 days earlier
+    weeks = dates - (dates - 1) % 7
+    week_rows = np.flatnonzero(np.r_[True, (exercise[1:] != exercise[:-1]) | (weeks[1:] != weeks[:-1])])
+    week_volume = np.add.reduceat(volume, week_rows)
+    week_exercise, week_starts = exercise[week_rows], weeks[week_rows]
+    latest_week = np.r_[np.flatnonzero(week_exercise[1:] != week_exercise[:-1]), len(week_rows) - 1]
+    previous = latest_week - 1
+    has_previous = (previous >= 0) & (week_exercise[np.maximum(previous, 0)] == week_exercise[latest_week]) & \
+        (week_starts[np.maximum(previous, 0)] == week_starts[latest_week] - 7)
+    previous_volume = np.where(has_previous, week_volume[np.maximum(previous, 0)], 0)
+
+    columns = zip(
+        exercise[group_starts].tolist(),
+        (group_ends - group_starts).tolist(),
+        np.add.reduceat(counts, group_starts).tolist(),
+        np.add.reduceat(volume, group_starts).tolist(),
+        np.add.reduceat(sum_weight, group_starts).tolist(),
+        np.maximum.reduceat(top_weight, group_starts).tolist(),
+        np.maximum.reduceat(epley, group_starts).tolist(),
+        np.maximum.reduceat(brzycki, group_starts).tolist(),
+        dates[last].tolist(),
+        volume[last].tolist(),
+        rolling_volume.tolist(),
+        rolling_e1rm.tolist(),
+        week_starts[latest_week].tolist(),
+        week_volume[latest_week].tolist(),
+        (week_volume[latest_week] - previous_volume).tolist(),
+    )
+    return {table.exercise_ids[ex_idx]: _summary(*values) for ex_idx, *values in columns}
@@ -0,0 +1,178 @@
+# autosave.py
+import queue
+import threading
+import time
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from storage import SessionCapture, compose_snapshot, dumps_compact, write_atomic
+
+# Quiet period that coalesces bursts of edits (reorder clicks, repeated renames) into one write
+AUTOSAVE_DELAY = 1.5
+# A dirty change never waits longer than this, even while edits keep arriving
+AUTOSAVE_MAX_DELAY = 10.0
+# Lower bound on the spacing between two writes
+AUTOSAVE_MIN_INTERVAL = 3.0
+# How long pausing the app waits for the worker to finish writing before letting Android suspend it
+AUTOSAVE_PAUSE_TIMEOUT = 2.0
+
+# Sections of app.data touched by each mutation record
+RECORD_SECTIONS = {
+    'add_plan': ('plans',),
+    'rename_plan': ('plans',),
+    'reorder_plans': ('plans',),
+    'delete_plan': ('plans', 'workout_sessions'),
+    'add_exercise': ('plans',),
+    'update_exercise': ('plans',),
+    'delete_exercise': ('plans',),
+    'reorder_exercises': ('plans',),
+    'add_session': ('workout_sessions',),
+}
+
+# Records that fully describe the state they touch, so a newer one with the same key replaces an older pending one
+def _coalesce_key(record):
+    op = record['op']
+    if op == 'reorder_plans':
+        return (op,)
+    if op in ('rename_plan', 'reorder_exercises'):
+        return (op, record['plan_id'])
+    if op == 'update_exercise':
+        return (op, record['plan_id'], record['exercise']['id'])
+    return None
+
+
+# Tracks which parts of app.data changed and persists them from a background thread.
+# Scheduling and snapshotting happen on the Kivy main thread; serialization of
+# the snapshot and all file writes happen on the worker.
+class Autosaver:
+    def __init__(self, data_source, store=None, snapshot_path=None):
+        self.data_source = data_source
+        self.store = store
+        self.snapshot_path = snapshot_path
+
+        self.dirty = set()
+        self.pending_records = [] # (coalesce key, serialized line)
+        self.unsnapshotted = store.pending_records if store is not None else 0
+        self._serialized_sections = set()
+        self._compact_requested = False
+        self._first_dirty = None
+        self._last_flush = 0
+        self._event = None
+
+        self._fragments = {} # Worker-owned cache of serialized sections for full snapshots
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self._thread.start()
+
+    # --- Main Thread ---
+
+    def mark_dirty(self, sections, record=None):
+        now = time.monotonic()
+        if self._first_dirty is None:
+            self._first_dirty = now
+        self.dirty.update(sections)
+
+        if record is not None and self.store is not None:
+            key = _coalesce_key(record)
+            if key is not None:
+                self.pending_records = [r for r in self.pending_records if r[0] != key]
+            self.pending_records.append((key, dumps_compact(record)))
+
+        if self._event:
+            self._event.cancel()
+        deadline = min(now + AUTOSAVE_DELAY, self._first_dirty + AUTOSAVE_MAX_DELAY)
+        deadline = max(deadline, self._last_flush + AUTOSAVE_MIN_INTERVAL)
+        self._event = Clock.schedule_once(self.flush, max(0, deadline - now))
+
+    def flush(self, *args):
+        if self._event:
+            self._event.cancel()
+            self._event = None
+        if not self.dirty and not self._compact_requested:
+            return
+
+        if self.store is not None:
+            lines = [line for key, line in self.pending_records]
+            self.pending_records = []
+            self._tasks.put((self.store.append_lines, lines))
+            self.unsnapshotted += len(lines)
+            if self.unsnapshotted >= self.store.compact_threshold or self._compact_requested:
+                self._tasks.put((self.store.compact, self._capture(self.data_source().keys())))
+                self.unsnapshotted = 0
+                self._compact_requested = False
+        else:
+            data = self.data_source()
+            # Sections never written before are serialized once, after that only dirty ones are
+            sections = (self.dirty | (set(data.keys()) - self._serialized_sections)) & set(data.keys())
+            self._serialized_sections.update(sections)
+            self._tasks.put((self._write_snapshot, self._capture(sections), list(data.keys())))
+            # The full snapshot written here is what compact_soon() asked for
+            self._compact_requested = False
+
+        self.dirty.clear()
+        self._first_dirty = None
+        self._last_flush = time.monotonic()
+
+    def compact_soon(self):
+        self._compact_requested = True
+        self.mark_dirty(())
+
+    def submit(self, func, *args):
+        # Other disk writes, e.g. the history backend's, run on the worker in order with the autosaves
+        self._tasks.put((func,) + args)
+
+    def wait(self, timeout):
+        # Blocks until everything queued so far has been written, or timeout seconds have passed
+        done = threading.Event()
+        self._tasks.put((done.set,))
+        return done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        self._tasks.put(None)
+        self._thread.join()
+        if self.store is not None:
+            self.store.close()
+
+    def _capture(self, sections):
+        # Pointer copies only: plan and exercise dicts are copied one level deep since handlers
+        # edit them in place, sessions are never mutated once they have been logged.
+        data = self.data_source()
+        snapshot = {}
+        for section in sections:
+            value = data.get(section)
+            if section == 'plans':
+                snapshot[section] = [dict(p, exercises=[dict(e) for e in p.get('exercises', [])]) for p in value]
+            elif section == 'workout_sessions':
+                snapshot[section] = SessionCapture(value)
+            elif isinstance(value, list):
+                snapshot[section] = list(value)
+            else:
+                snapshot[section] = value
+        return snapshot
+
+    # --- Worker Thread ---
+
+    def _write_snapshot(self, snapshot, order):
+        for section, value in snapshot.items():
+            if section == 'workout_sessions':
+                self._fragments[section] = (value.lines(), value.last_date)
+            else:
+                self._fragments[section] = dumps_compact(value)
+        header_fragments = [(section, self._fragments[section]) for section in order
+                            if section in self._fragments and section != 'workout_sessions']
+        session_lines, last_date = self._fragments.get('workout_sessions', ([], None))
+        write_atomic(self.snapshot_path, compose_snapshot(header_fragments, session_lines, last_date))
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            func, *args = task
+            try:
+                func(*args)
+            except Exception:
+                # A failed write must not stop the worker, later saves and waits still need it
+                Logger.exception('Autosave: task failed')
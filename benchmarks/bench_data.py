@@ -0,0 +1,239 @@
+# benchmarks/bench_data.py
+# Times the data layer of GymApp over synthetic histories, without a window:
+#
+#   python -m benchmarks.bench_data --sessions 10000 100000 --history json sqlite columnar
+#   python -m benchmarks.bench_data --save-baseline     (then later, to compare against it)
+#   python -m benchmarks.bench_data
+#
+# Each case loads a copy of a generated data directory and times load_data, the first history
+# query, warm history and last-sets lookups, the data behind plot_progress, add_session,
+# delete_item and save_data. The JSON history keeps every set in memory, so a million sessions
+# at the default shape needs several GB; shrink --exercises and --sets for that scale.
+#
+# baseline_data.json next to this file holds a run at the default parameters; a run of the
+# same dataset shape is compared against it, other shapes only print their timings.
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_WINDOW', '')           # No window provider, nothing is ever drawn
+# Fixed metrics, so dp() and sp() do not ask a window for them
+os.environ.setdefault('KIVY_DPI', '96')
+os.environ.setdefault('KIVY_METRICS_DENSITY', '1')
+os.environ.setdefault('KIVY_METRICS_FONTSCALE', '1')
+
+import main
+from history import log_stats
+from benchmarks.synthetic import generate_data, write_dataset
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_data.json')
+# Slower than the baseline by more than this factor is reported as a regression
+REGRESSION_FACTOR = 1.25
+# Exercises sampled for the per-call lookups
+LOOKUP_SAMPLE = 20
+
+OPERATIONS = (
+    'load_data', 'first_history_query', 'get_exercise_history', 'get_last_sets_for_exercise',
+    'plot_progress_data', 'exercise_summary', 'add_session', 'delete_item', 'save_data',
+)
+
+
+class BenchApp(main.GymApp):
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.data_dir = directory
+
+    @property
+    def user_data_dir(self):
+        return self.data_dir
+
+
+def open_app(directory, storage, history):
+    # The backends are chosen by module constants that main.py reads from the environment
+    main.STORAGE_MODE = storage
+    main.HISTORY_BACKEND = history
+    return BenchApp(directory)
+
+def close_app(app):
+    app.save_data()
+    if app.history_db is not None:
+        app.history_db.close()
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+# --- Cases ---
+
+def prepare(source_dir, storage, history):
+    # A data directory as the app leaves it after its first start with this configuration,
+    # so one-time imports into the history backends are not part of the timings
+    directory = tempfile.mkdtemp(prefix=f'gymbench-{storage}-{history}-')
+    shutil.copy(os.path.join(source_dir, 'data.json'), directory)
+    app = open_app(directory, storage, history)
+    app.load_data()
+    close_app(app)
+    return directory
+
+def run_sample(template_dir, storage, history):
+    root = tempfile.mkdtemp(prefix='gymbench-run-')
+    directory = os.path.join(root, 'data')
+    try:
+        shutil.copytree(template_dir, directory)
+        app = open_app(directory, storage, history)
+        timings = {}
+
+        start = time.perf_counter()
+        app.load_data()
+        timings['load_data'] = elapsed_ms(start)
+
+        exercise_ids = [ex['id'] for plan in app.data['plans'] for ex in plan['exercises']][:LOOKUP_SAMPLE]
+        start = time.perf_counter()
+        app.get_exercise_history(exercise_ids[0], limit=5)
+        timings['first_history_query'] = elapsed_ms(start)
+
+        # Per-call averages over a sample of exercises, everything loaded and indexed by now
+        start = time.perf_counter()
+        for ex_id in exercise_ids:
+            app.get_exercise_history(ex_id, limit=5)
+        timings['get_exercise_history'] = elapsed_ms(start) / len(exercise_ids)
+
+        start = time.perf_counter()
+        for ex_id in exercise_ids:
+            app.get_last_sets_for_exercise(ex_id)
+        timings['get_last_sets_for_exercise'] = elapsed_ms(start) / len(exercise_ids)
+
+        # What ExerciseDetailScreen.plot_progress reads: the last five logs and the full series
+        start = time.perf_counter()
+        for ex_id in exercise_ids:
+            app.get_exercise_stats(ex_id, limit=5)
+            app.get_exercise_series(ex_id)
+        timings['plot_progress_data'] = elapsed_ms(start) / len(exercise_ids)
+
+        # The stats line of ExerciseDetailScreen: every exercise summarized, over an already loaded set table
+        app.get_set_table()
+        start = time.perf_counter()
+        app.get_exercise_summary()
+        timings['exercise_summary'] = elapsed_ms(start)
+
+        plan = app.data['plans'][0]
+        sets = [{'weight': 50.0, 'reps': 10}] * 3
+        session = {
+            'session_id': 'sess_benchmark',
+            'date': '2030-01-01',
+            'plan_id': plan['id'],
+            'exercises': [{'exercise_id': ex['id'], 'name': ex['name'], 'sets': sets, 'notes': '', 'stats': log_stats(sets)}
+                          for ex in plan['exercises']],
+        }
+        start = time.perf_counter()
+        app.add_session(session)
+        timings['add_session'] = elapsed_ms(start)
+
+        start = time.perf_counter()
+        app.delete_item('plan', app.data['plans'][-1]['id'])
+        timings['delete_item'] = elapsed_ms(start)
+
+        # Waits for the autosave worker, so this is the full cost of persisting both changes
+        start = time.perf_counter()
+        app.save_data()
+        timings['save_data'] = elapsed_ms(start)
+
+        if app.history_db is not None:
+            app.history_db.close()
+        return timings
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def run_case(source_dir, storage, history, repeat):
+    template_dir = prepare(source_dir, storage, history)
+    try:
+        samples = [run_sample(template_dir, storage, history) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(template_dir, ignore_errors=True)
+    return {op: round(statistics.median(s[op] for s in samples), 3) for op in OPERATIONS}
+
+
+# --- Reporting ---
+
+def print_report(results, baseline):
+    regressions = []
+    for case, timings in results.items():
+        print(f"\n{case}")
+        base = baseline.get(case, {})
+        for op in OPERATIONS:
+            line = f"  {op:<28}{timings[op]:>12.3f} ms"
+            if op in base and base[op] > 0:
+                ratio = timings[op] / base[op]
+                line += f"   {ratio:5.2f}x baseline"
+                if ratio > REGRESSION_FACTOR:
+                    line += '  REGRESSION'
+                    regressions.append((case, op, ratio))
+            print(line)
+    return regressions
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description='Data-layer benchmarks over synthetic histories.')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10000])
+    parser.add_argument('--plans', type=int, default=6)
+    parser.add_argument('--exercises', type=int, default=6, help='exercises per plan')
+    parser.add_argument('--sets', type=int, default=4, help='sets per logged exercise')
+    parser.add_argument('--storage', nargs='+', default=['journal'], choices=['journal', 'json'])
+    parser.add_argument('--history', nargs='+', default=['json', 'sqlite', 'columnar'], choices=['json', 'sqlite', 'columnar'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    shape = {'plans': args.plans, 'exercises': args.exercises, 'sets': args.sets, 'seed': args.seed}
+    results = {}
+    for sessions in args.sessions:
+        source_dir = tempfile.mkdtemp(prefix='gymbench-data-')
+        try:
+            start = time.perf_counter()
+            write_dataset(source_dir, generate_data(args.plans, args.exercises, sessions, args.sets, args.seed))
+            print(f"Generated {sessions} sessions in {elapsed_ms(start) / 1000:.1f} s", file=sys.stderr)
+            for storage in args.storage:
+                for history in args.history:
+                    case = f"{storage}/{history}/{sessions}"
+                    print(f"Running {case}", file=sys.stderr)
+                    results[case] = run_case(source_dir, storage, history, args.repeat)
+        finally:
+            shutil.rmtree(source_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        # Timings of a differently shaped dataset are not comparable
+        if stored.get('shape') == shape:
+            baseline = stored.get('results', {})
+    regressions = print_report(results, baseline)
+
+    report = {
+        'shape': shape,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,253 @@
+# benchmarks/bench_ui.py
+# Times how long the screens take to fill in with a large synthetic dataset, in an offscreen
+# window that needs no display or GPU:
+#
+#   python -m benchmarks.bench_ui --plans 50 --exercises 40 --sets 8
+#   KIVY_GL_BACKEND=mock python -m benchmarks.bench_ui      (widget work only, no GL calls at all)
+#
+# Every operation is called programmatically --samples times, spread over different plans and
+# exercises. Each sample reports the call itself and the call plus the frame after it, where
+# RecycleViews build their rows and layouts run, as percentiles; the widget count is the
+# screen's widget tree after the last sample. Screens are built lazily, so the first visit to
+# each one is timed separately.
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_WINDOW', 'sdl2')
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen') # A real window and GL context, but no display
+os.environ.setdefault('KCFG_GRAPHICS_MAXFPS', '0')    # Frames are not paced, so waiting for one costs nothing
+
+from benchmarks.bench_data import close_app, elapsed_ms, open_app
+from benchmarks.synthetic import generate_data, write_dataset
+import main
+from kivy.base import EventLoop, runTouchApp, stopTouchApp
+from kivy.uix.screenmanager import NoTransition
+
+PERCENTILES = (50, 90, 99)
+# Untimed frames before each sample, so it starts from a settled screen
+SETTLE_FRAMES = 2
+# Longest wait for the record book, built on the autosave worker
+RECORDS_TIMEOUT = 30.0
+
+
+def frames(count=1):
+    for _ in range(count):
+        EventLoop.idle()
+
+def build_records(app):
+    # Built off the main thread and handed back through the Clock, so the samples never include it
+    app.request_records()
+    app.autosaver.wait(RECORDS_TIMEOUT)
+    frames()
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def widget_count(widget):
+    return sum(1 for _ in widget.walk())
+
+def start_app(directory, storage, history):
+    # Screens are constructed by the benchmark, where they can be timed, not by the prewarm
+    main.PREWARM_SCREENS = False
+    # The kv/ files import colours and helpers from __main__, which is main.py in the app
+    sys.modules['__main__'] = main
+    app = open_app(directory, storage, history)
+    app._run_prepare()
+    runTouchApp(embedded=True) # Starts the event loop; frames are driven one at a time with frames()
+    frames(SETTLE_FRAMES)
+    return app
+
+def stop_app(app):
+    close_app(app)
+    stopTouchApp()
+
+
+# --- Driving the screens ---
+
+class UIBench:
+    def __init__(self, app, samples):
+        self.app = app
+        self.sm = app.root
+        self.samples = samples
+        self.results = {}
+        self.construct = {}
+        # Navigation is timed as the work it causes, not the length of the slide animation
+        self.sm.transition = NoTransition()
+
+    def measure(self, name, screen_name, action):
+        # action(i) runs sample i; the screen is shown first, as it would be when used
+        screen = self.sm.get_screen(screen_name)
+        call_ms, frame_ms = [], []
+        for i in range(self.samples):
+            frames(SETTLE_FRAMES)
+            start = time.perf_counter()
+            action(i)
+            call_ms.append(elapsed_ms(start))
+            frames()
+            frame_ms.append(elapsed_ms(start))
+        frames(SETTLE_FRAMES)
+        self.results[name] = {
+            'call_ms': {f'p{p}': round(percentile(call_ms, p), 3) for p in PERCENTILES},
+            'frame_ms': {f'p{p}': round(percentile(frame_ms, p), 3) for p in PERCENTILES},
+            'max_ms': round(max(frame_ms), 3),
+            'widgets': widget_count(screen),
+        }
+
+    def construct_screens(self):
+        for name in list(self.sm.pending):
+            start = time.perf_counter()
+            self.sm.get_screen(name)
+            self.construct[name] = round(elapsed_ms(start), 3)
+
+    def run(self):
+        self.construct_screens()
+        build_records(self.app)
+        sm = self.sm
+        plans = [plan for plan in self.app.data['plans'] if plan['exercises']]
+        plan_select = sm.get_screen('plan_select_screen')
+        plan_screen = sm.get_screen('workout_plan_screen')
+        detail = sm.get_screen('exercise_detail_screen')
+        active = sm.get_screen('active_workout_screen')
+        summary = sm.get_screen('workout_summary_screen')
+
+        def plan_at(i):
+            return plans[i % len(plans)]
+
+        def exercise_at(plan, i):
+            return plan['exercises'][(i * 7) % len(plan['exercises'])]
+
+        # Flipping edit mode first, as toggle_edit_mode does, so every call changes every row
+        sm.current = 'plan_select_screen'
+        def populate_plans(i):
+            plan_select.is_editing = not plan_select.is_editing
+            plan_select.populate_plans()
+        self.measure('PlanSelectScreen.populate_plans', 'plan_select_screen', populate_plans)
+        plan_select.is_editing = False
+        plan_select.populate_plans()
+
+        def select_plan(i):
+            sm.current = 'plan_select_screen'
+            plan_select.select_plan(plan_at(i)['id'])
+        self.measure('PlanSelectScreen.select_plan', 'workout_plan_screen', select_plan)
+
+        def update_view(i):
+            plan_screen.current_plan_id = plan_at(i)['id']
+            plan_screen.update_view()
+        self.measure('WorkoutPlanScreen.update_view', 'workout_plan_screen', update_view)
+
+        plan = plan_at(0)
+        plan_screen.load_plan(plan_id=plan['id'])
+        def open_exercise(i):
+            sm.current = 'workout_plan_screen'
+            plan_screen.open_exercise(exercise_at(plan, i)['id'])
+        self.measure('WorkoutPlanScreen.open_exercise', 'exercise_detail_screen', open_exercise)
+
+        def plot_progress(i):
+            detail.current_exercise_id = exercise_at(plan, i)['id']
+            detail.plot_progress()
+        detail.show_full_history = False
+        self.measure('ExerciseDetailScreen.plot_progress', 'exercise_detail_screen', plot_progress)
+        detail.show_full_history = True
+        self.measure('ExerciseDetailScreen.plot_progress (full history)', 'exercise_detail_screen', plot_progress)
+        detail.show_full_history = False
+
+        sm.current = 'workout_plan_screen'
+        plan_screen.toggle_workout_mode()
+        sm.current = 'active_workout_screen'
+        def load_exercise(i):
+            active.load_exercise(exercise_at(plan, i), plan_screen.active_session_data)
+        self.measure('ActiveWorkoutScreen.load_exercise', 'active_workout_screen', load_exercise)
+
+        # A finished workout logging every exercise of the plan with its sets from last time
+        def session_for(plan):
+            return {
+                'plan_id': plan['id'],
+                'date': plan_screen.active_session_data['date'],
+                'exercises': {ex['id']: {
+                    'exercise_id': ex['id'],
+                    'name': ex['name'],
+                    'sets': self.app.get_last_sets_for_exercise(ex['id']),
+                    'notes': '',
+                } for ex in plan['exercises']},
+            }
+        sessions = [session_for(p) for p in plans[:self.samples]]
+        sm.current = 'workout_summary_screen'
+        def load_summary(i):
+            summary.load_summary(sessions[i % len(sessions)], plan_screen)
+        self.measure('WorkoutSummaryScreen.load_summary', 'workout_summary_screen', load_summary)
+
+        plan_screen.stop_workout(plan_screen.active_session_data, save=False)
+        return self.results
+
+
+# --- Reporting ---
+
+def print_report(construct, results):
+    print('\nFirst visit (screen construction)')
+    for name, ms in construct.items():
+        print(f"  {name:<52}{ms:>10.3f} ms")
+    header = ''.join(f"{'call p' + str(p):>11}" for p in PERCENTILES)
+    header += ''.join(f"{'frame p' + str(p):>11}" for p in PERCENTILES)
+    print(f"\n  {'operation':<50}{header}{'max':>9}{'widgets':>9}")
+    for name, r in results.items():
+        values = ''.join(f"{v:>11.2f}" for v in list(r['call_ms'].values()) + list(r['frame_ms'].values()))
+        print(f"  {name:<50}{values}{r['max_ms']:>9.2f}{r['widgets']:>9}")
+    print('  (milliseconds; frame is the call plus the frame after it)')
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description='Screen population benchmarks in an offscreen window.')
+    parser.add_argument('--plans', type=int, default=50)
+    parser.add_argument('--exercises', type=int, default=40, help='exercises per plan')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--sets', type=int, default=8, help='sets per logged exercise')
+    parser.add_argument('--samples', type=int, default=50, help='calls timed per operation')
+    parser.add_argument('--storage', default='journal', choices=['journal', 'json'])
+    parser.add_argument('--history', default='json', choices=['json', 'sqlite', 'columnar'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='gymbench-ui-')
+    try:
+        start = time.perf_counter()
+        write_dataset(directory, generate_data(args.plans, args.exercises, args.sessions, args.sets, args.seed))
+        print(f"Generated {args.sessions} sessions in {elapsed_ms(start) / 1000:.1f} s", file=sys.stderr)
+
+        app = start_app(directory, args.storage, args.history)
+        try:
+            bench = UIBench(app, args.samples)
+            results = bench.run()
+        finally:
+            stop_app(app)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print_report(bench.construct, results)
+    if args.output:
+        report = {
+            'shape': {'plans': args.plans, 'exercises': args.exercises, 'sessions': args.sessions,
+                      'sets': args.sets, 'seed': args.seed},
+            'storage': args.storage,
+            'history': args.history,
+            'gl_backend': os.environ.get('KIVY_GL_BACKEND', 'default'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'construct_ms': bench.construct,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
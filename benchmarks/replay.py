@@ -0,0 +1,260 @@
+# benchmarks/replay.py
+# Replays a recorded interaction trace (see tracing.py) in an offscreen window and times every
+# step of it, against a copy of a real data directory or a generated dataset:
+#
+#   GYMAPP_RECORD_TRACE=1 python main.py                   (use the app; traces.jsonl is written
+#                                                           to its data directory)
+#   python -m benchmarks.replay --trace path/to/traces.jsonl --data path/to/data/dir
+#   python -m benchmarks.replay --sessions 20000 --save-baseline   (the bundled sample trace)
+#   python -m benchmarks.replay --sessions 20000
+#
+# Plan and exercise ids the dataset does not have are mapped, in order of first use, onto its
+# own plans and exercises, so a trace recorded on a phone also replays against generated data.
+# Steps run back to back without the recorded pauses; each is timed to the end of the frame
+# after it. Screens and the personal records are built before the replay, as the prewarm
+# does in the app.
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_ui import SETTLE_FRAMES, build_records, frames, percentile, start_app, stop_app
+from benchmarks.bench_data import REGRESSION_FACTOR, elapsed_ms
+from benchmarks.synthetic import generate_data, write_dataset
+from tracing import read_traces
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_TRACE = os.path.join(BENCH_DIR, 'traces', 'sample.jsonl')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline_replay.json')
+
+
+def bind_trace(events, data):
+    # [(step, args)] with every id one the dataset has
+    plans = [plan for plan in data['plans'] if plan['exercises']]
+    known = {plan['id']: plan for plan in plans}
+    plan_map, exercise_map = {}, {}
+    plan = None
+    steps = []
+    for event in events:
+        step, args = event[1], dict(event[2]) if len(event) > 2 else {}
+        if step == 'select_plan':
+            plan_id = args['plan_id']
+            if plan_id not in known:
+                plan_id = plan_map.setdefault(plan_id, plans[len(plan_map) % len(plans)]['id'])
+            plan = known[plan_id]
+            args['plan_id'] = plan_id
+        elif step == 'load_exercise':
+            exercise_id = args['exercise_id']
+            if exercise_id not in {ex['id'] for ex in plan['exercises']}:
+                mapped = exercise_map.setdefault(plan['id'], {})
+                exercise_id = mapped.setdefault(exercise_id, plan['exercises'][len(mapped) % len(plan['exercises'])]['id'])
+            args['exercise_id'] = exercise_id
+        steps.append((step, args))
+    return steps
+
+
+class Replayer:
+    def __init__(self, app):
+        self.app = app
+        self.sm = app.root
+        for name in list(self.sm.pending):
+            self.sm.get_screen(name)
+        build_records(app)
+        self.plan_select = self.sm.get_screen('plan_select_screen')
+        self.plan_screen = self.sm.get_screen('workout_plan_screen')
+        self.active = self.sm.get_screen('active_workout_screen')
+
+    def perform(self, step, args):
+        # Each step does what the button or text field that recorded it does
+        sm = self.sm
+        if step == 'select_plan':
+            sm.current = 'plan_select_screen'
+            self.plan_select.select_plan(args['plan_id'])
+        elif step == 'start_workout':
+            self.plan_screen.toggle_workout_mode()
+        elif step == 'load_exercise':
+            self.plan_screen.open_exercise(args['exercise_id'])
+        elif step == 'update_set':
+            # Typed into the visible row's input, so its on_text handler and row refresh are timed too
+            entry = self.set_entry(args['index'])
+            if entry is not None:
+                entry.ids[args['field'] + '_input'].text = args['text']
+        elif step == 'add_set':
+            self.active.add_set()
+        elif step == 'remove_set':
+            self.active.remove_set(args['index'])
+        elif step == 'finish_exercise':
+            self.active.finish_exercise()
+        elif step == 'load_summary':
+            self.plan_screen.toggle_workout_mode()
+        elif step == 'stop_workout':
+            if args['save']:
+                self.plan_screen.stop_workout(self.plan_screen.active_session_data, save=True)
+                sm.current = 'plan_select_screen'
+            else:
+                self.plan_screen._confirm_go_back()
+        else:
+            raise ValueError(f"Unknown trace step '{step}'")
+
+    def set_entry(self, index):
+        # The SetEntry showing row index, scrolled into view first when it is off screen
+        set_list = self.active.ids.set_list
+        if index >= len(set_list.data):
+            return None
+        entry = set_list.view_adapter.get_visible_view(index)
+        if entry is None:
+            set_list.scroll_y = 1 - index / max(1, len(set_list.data) - 1)
+            frames()
+            entry = set_list.view_adapter.get_visible_view(index)
+        return entry
+
+    def replay(self, steps):
+        # [(step, ms)], each step timed until the frame after it is done
+        timings = []
+        for step, args in steps:
+            start = time.perf_counter()
+            self.perform(step, args)
+            frames()
+            timings.append((step, elapsed_ms(start)))
+            frames(SETTLE_FRAMES)
+        return timings
+
+
+def summarize_runs(runs):
+    by_step = {}
+    for timings in runs:
+        for step, ms in timings:
+            by_step.setdefault(step, []).append(ms)
+    steps = {step: {
+        'count': len(samples) // len(runs),
+        'p50': round(percentile(samples, 50), 3),
+        'p90': round(percentile(samples, 90), 3),
+        'max': round(max(samples), 3),
+        'total': round(sum(samples) / len(runs), 3),
+    } for step, samples in by_step.items()}
+    return {
+        'end_to_end_ms': round(statistics.median(sum(ms for _, ms in timings) for timings in runs), 3),
+        'steps': steps,
+    }
+
+def slowest_steps(runs, count=5):
+    # The slowest single steps of the first run, with their position in the trace
+    ranked = sorted(enumerate(runs[0]), key=lambda item: item[1][1], reverse=True)
+    return [(i, step, round(ms, 3)) for i, (step, ms) in ranked[:count]]
+
+
+# --- Reporting ---
+
+def print_report(summary, slowest, baseline):
+    regressions = []
+    base_steps = baseline.get('steps', {})
+    print(f"\n  {'step':<20}{'count':>7}{'p50':>10}{'p90':>10}{'max':>10}{'total':>11}")
+    for step, s in summary['steps'].items():
+        line = f"  {step:<20}{s['count']:>7}{s['p50']:>10.2f}{s['p90']:>10.2f}{s['max']:>10.2f}{s['total']:>11.2f}"
+        base = base_steps.get(step, {}).get('p50')
+        if base:
+            ratio = s['p50'] / base
+            line += f"   {ratio:5.2f}x baseline p50"
+            if ratio > REGRESSION_FACTOR:
+                line += '  REGRESSION'
+                regressions.append((step, ratio))
+        print(line)
+
+    line = f"\n  end to end {summary['end_to_end_ms']:.2f} ms"
+    base = baseline.get('end_to_end_ms')
+    if base:
+        ratio = summary['end_to_end_ms'] / base
+        line += f"   {ratio:5.2f}x baseline"
+        if ratio > REGRESSION_FACTOR:
+            line += '  REGRESSION'
+            regressions.append(('end to end', ratio))
+    print(line)
+    print('  slowest steps: ' + ', '.join(f"#{i} {step} {ms:.2f}" for i, step, ms in slowest))
+    print('  (milliseconds; every step is timed to the end of the frame after it)')
+    return regressions
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded interaction trace and time each step.')
+    parser.add_argument('--trace', default=SAMPLE_TRACE, help='traces.jsonl written with GYMAPP_RECORD_TRACE=1')
+    parser.add_argument('--index', type=int, default=-1, help='which trace of the file to replay (default: the last)')
+    parser.add_argument('--data', help='data directory (or data.json) to replay against, copied first; '
+                                       'without it a dataset is generated')
+    parser.add_argument('--plans', type=int, default=6)
+    parser.add_argument('--exercises', type=int, default=6, help='exercises per plan')
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--sets', type=int, default=4, help='sets per logged exercise')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--storage', default='journal', choices=['journal', 'json'])
+    parser.add_argument('--history', default='json', choices=['json', 'sqlite', 'columnar'])
+    parser.add_argument('--repeat', type=int, default=3, help='replays of the trace, one after another in the same app')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--output', help='also write the results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    trace = read_traces(args.trace)[args.index]
+    if args.data:
+        dataset = {'data': os.path.abspath(args.data)}
+    else:
+        dataset = {'plans': args.plans, 'exercises': args.exercises, 'sessions': args.sessions,
+                   'sets': args.sets, 'seed': args.seed}
+    case = {'trace': os.path.basename(args.trace), 'index': args.index, 'dataset': dataset,
+            'storage': args.storage, 'history': args.history}
+
+    root = tempfile.mkdtemp(prefix='gymbench-replay-')
+    directory = os.path.join(root, 'data')
+    try:
+        # The whole data directory, so a journal and history databases next to data.json come along
+        if args.data and os.path.isdir(args.data):
+            shutil.copytree(args.data, directory)
+        elif args.data:
+            os.makedirs(directory)
+            shutil.copy(args.data, os.path.join(directory, 'data.json'))
+        else:
+            write_dataset(directory, generate_data(args.plans, args.exercises, args.sessions, args.sets, args.seed))
+
+        app = start_app(directory, args.storage, args.history)
+        try:
+            steps = bind_trace(trace['events'], app.data)
+            print(f"Replaying {len(steps)} steps, {args.repeat} times", file=sys.stderr)
+            replayer = Replayer(app)
+            runs = [replayer.replay(steps) for _ in range(args.repeat)]
+        finally:
+            stop_app(app)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    summary = summarize_runs(runs)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        # Only a baseline of the same trace, dataset and backends is comparable
+        if stored.get('case') == case:
+            baseline = stored.get('results', {})
+    regressions = print_report(summary, slowest_steps(runs), baseline)
+
+    report = {
+        'case': case,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': summary,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
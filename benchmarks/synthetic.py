@@ -0,0 +1,72 @@
+# benchmarks/synthetic.py
+import os
+import random
+from datetime import date, timedelta
+
+from history import log_stats
+from migrations import SCHEMA_VERSION
+from storage import format_snapshot, write_atomic
+
+# Histories start here and are spread over SPAN_DAYS, several sessions a day for the big ones
+START_DATE = date(2015, 1, 1)
+SPAN_DAYS = 3650
+MUSCLE_GROUPS = ["None", "Chest", "Back", "Shoulders", "Biceps", "Triceps", "Quads", "Hamstrings", "Glutes", "Calves", "Abs"]
+
+
+def generate_data(plans=6, exercises_per_plan=6, sessions=10000, sets=4, seed=0):
+    # app.data with 'plans' x 'exercises_per_plan' exercises and 'sessions' workouts, each
+    # logging every exercise of one plan with 'sets' sets. The same arguments always give
+    # the same data, so timings stay comparable between runs.
+    rng = random.Random(seed)
+    plan_list = []
+    for p in range(plans):
+        plan_list.append({
+            'id': f'plan_{p:04d}',
+            'name': f'Plan {p + 1}',
+            'exercises': [{
+                'id': f'ex_{p:04d}_{e:03d}',
+                'name': f'Exercise {p + 1}.{e + 1}',
+                'primary_muscle': MUSCLE_GROUPS[1 + (p + e) % (len(MUSCLE_GROUPS) - 1)],
+                'secondary_muscle': 'None',
+                'rest_time': 60 + 15 * (e % 4),
+            } for e in range(exercises_per_plan)],
+        })
+
+    # Starting loads per exercise, drifting upwards over the history
+    base_weight = {ex['id']: rng.choice((20, 40, 60, 80, 100)) for plan in plan_list for ex in plan['exercises']}
+    session_list = []
+    for i in range(sessions):
+        plan = plan_list[i % plans]
+        progress = i / max(1, sessions)
+        logs = []
+        for ex in plan['exercises']:
+            weight = base_weight[ex['id']] * (1 + progress)
+            set_list = [{
+                'weight': round(weight + rng.choice((-5, -2.5, 0, 0, 2.5)), 1),
+                'reps': rng.randint(5, 12),
+            } for _ in range(sets)]
+            logs.append({
+                'exercise_id': ex['id'],
+                'name': ex['name'],
+                'sets': set_list,
+                'notes': '',
+                'stats': log_stats(set_list),
+            })
+        session_list.append({
+            'session_id': f'sess_{i:016x}',
+            'date': (START_DATE + timedelta(days=i * SPAN_DAYS // max(1, sessions))).isoformat(),
+            'plan_id': plan['id'],
+            'exercises': logs,
+        })
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'plans': plan_list,
+        'muscle_groups': list(MUSCLE_GROUPS),
+        'workout_sessions': session_list,
+    }
+
+def write_dataset(directory, data):
+    # data.json in the snapshot format the app itself writes
+    os.makedirs(directory, exist_ok=True)
+    write_atomic(os.path.join(directory, 'data.json'), format_snapshot(data))
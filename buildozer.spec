@@ -22,7 +22,7 @@ source.include_exts = py,png,jpg,kv,atlas,json,ttf
 source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = bin, venv
+source.exclude_dirs = bin, venv, benchmarks
 
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
@@ -37,7 +37,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3==3.7.6,hostpython3==3.7.6,kivy
+requirements = python3==3.7.6,hostpython3==3.7.6,kivy,sqlite3,numpy
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
@@ -0,0 +1,115 @@
+# charting.py
+import bisect
+from datetime import date
+
+# Coarsest decimation level kept per series; smaller series are drawn from full resolution
+MIN_LEVEL_POINTS = 64
+
+
+def lttb(xs, ys, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, from each bucket in
+    # between, the point forming the largest triangle with its neighbours' picks.
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    out_x, out_y = [xs[0]], [ys[0]]
+    bucket = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        # Average of the next bucket stands in for the point not chosen yet
+        count = max(1, next_end - end)
+        avg_x = sum(xs[end:next_end]) / count if next_end > end else xs[-1]
+        avg_y = sum(ys[end:next_end]) / count if next_end > end else ys[-1]
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        a = best
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+# A series with a pyramid of LTTB-decimated copies, each half the size of the one below it.
+# A view of any window is served from the coarsest level that still has enough points there,
+# so the work per redraw is bounded by the requested point count, not the history length.
+class DecimatedSeries:
+    def __init__(self, xs, ys):
+        self.levels = [(list(xs), list(ys))]
+        while len(self.levels[-1][0]) // 2 >= MIN_LEVEL_POINTS:
+            prev_x, prev_y = self.levels[-1]
+            self.levels.append(lttb(prev_x, prev_y, len(prev_x) // 2))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def x_range(self):
+        xs = self.levels[0][0]
+        return (xs[0], xs[-1]) if xs else (0, 0)
+
+    def view(self, x0, x1, max_points):
+        # Points inside [x0, x1] plus one neighbour on each side, so lines can be clipped
+        # at the window edges instead of stopping short of them.
+        for level, (xs, ys) in enumerate(reversed(self.levels)):
+            lo = max(0, bisect.bisect_left(xs, x0) - 1)
+            hi = min(len(xs), bisect.bisect_right(xs, x1) + 1)
+            if hi - lo >= max_points or level == len(self.levels) - 1:
+                break
+        return lttb(xs[lo:hi], ys[lo:hi], max_points)
+
+
+def clip_to_window(xs, ys, x0, x1):
+    # Cuts a polyline to x0..x1, interpolating where it crosses the edges
+    if len(xs) < 2:
+        return ([xs[0]], [ys[0]]) if xs and x0 <= xs[0] <= x1 else ([], [])
+    out_x, out_y = [], []
+    for i in range(1, len(xs)):
+        xa, ya, xb, yb = xs[i - 1], ys[i - 1], xs[i], ys[i]
+        lo, hi = max(xa, x0), min(xb, x1)
+        if lo > hi: continue
+        y_lo = ya if lo == xa else ya + (yb - ya) * (lo - xa) / (xb - xa)
+        y_hi = yb if hi == xb else ya + (yb - ya) * (hi - xa) / (xb - xa)
+        if not out_x or (out_x[-1], out_y[-1]) != (lo, y_lo):
+            out_x.append(lo)
+            out_y.append(y_lo)
+        out_x.append(hi)
+        out_y.append(y_hi)
+    return out_x, out_y
+
+
+# --- Time Axis ---
+
+def date_ticks(x0, x1, count):
+    # Evenly spaced ticks over a window of date ordinals, labelled at a resolution that suits its span
+    span = x1 - x0
+    if span > 1460:
+        fmt = '%Y'
+    elif span > 60:
+        fmt = '%b %y'
+    else:
+        fmt = '%d %b'
+    ticks = []
+    for i in range(count):
+        x = x0 + span * i / (count - 1) if count > 1 else x0
+        ticks.append((x, date.fromordinal(max(1, int(round(x)))).strftime(fmt)))
+    return ticks
+
+
+# Whole-history series of one exercise for the time-axis charts, x being the date ordinal
+class ExerciseSeries:
+    def __init__(self, timeline):
+        # timeline: [(ISO date, stats)] oldest first, as returned by get_exercise_timeline()
+        xs = [date.fromisoformat(d).toordinal() for d, stats in timeline]
+        self.weight = DecimatedSeries(xs, [stats['avg_weight'] for d, stats in timeline])
+        self.reps = DecimatedSeries(xs, [stats['avg_reps'] for d, stats in timeline])
+        self.volume = DecimatedSeries(xs, [stats['volume'] for d, stats in timeline])
@@ -0,0 +1,479 @@
+# columnar.py
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+from analytics import SetTable, date_ordinal, date_str
+from migrations import migrate_session
+from query import LogRow, limited
+from storage import PendingWrites, dumps_compact, write_atomic
+
+MAGIC = b'GYMH'
+VERSION = 2
+# magic, version, byte order (0 little, 1 big), session/log/set/exercise counts, blob sizes
+HEADER = struct.Struct('<4sHB5xIIIIII')
+ALIGN = 8
+
+# Sessions appended after the last rewrite are kept in a small JSON lines tail file
+COLUMNAR_TAIL_LIMIT = 50
+
+# (name, array typecode, length key) in file order. Offsets have one trailing entry so
+# column[i]..column[i + 1] is the range belonging to row i.
+COLUMNS = (
+    ('session_date', 'i', 'sessions'),      # date ordinal
+    ('session_plan', 'i', 'sessions'),      # index into plan_ids
+    ('session_logs', 'I', 'sessions+1'),    # offsets into the log columns
+    ('log_session', 'i', 'logs'),
+    ('log_exercise', 'i', 'logs'),          # index into exercise_ids
+    ('log_name', 'i', 'logs'),              # index into names
+    ('log_sets', 'I', 'logs+1'),            # offsets into the set columns
+    ('stat_volume', 'f', 'logs'),           # precomputed log_stats() values
+    ('stat_avg_weight', 'f', 'logs'),
+    ('stat_avg_reps', 'f', 'logs'),
+    ('stat_top_weight', 'f', 'logs'),
+    ('stat_top_reps', 'H', 'logs'),
+    ('stat_e1rm', 'f', 'logs'),
+    ('exercise_logs', 'I', 'exercises+1'),  # offsets into exercise_log_ids
+    ('exercise_log_ids', 'i', 'logs'),      # log indices grouped by exercise, date ordered
+    ('set_weight', 'f', 'sets'),
+    ('set_reps', 'H', 'sets'),
+)
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _column_length(key, counts):
+    name, _, extra = key.partition('+')
+    return counts[name] + (1 if extra else 0)
+
+
+# --- Writer ---
+
+def write_columnar(path, sessions):
+    # Sessions are stored in date order so per-exercise log ranges come out date ordered too
+    sessions = sorted(sessions, key=lambda s: s.get('date', ''))
+    cols = {name: array(code) for name, code, _ in COLUMNS}
+    exercise_ids, plan_ids, names = [], [], []
+    exercise_index, plan_index, name_index = {}, {}, {}
+    session_ids, notes = [], {}
+    logs_by_exercise = []
+
+    def intern(value, values, index):
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        return index[value]
+
+    for session in sessions:
+        session_idx = len(cols['session_date'])
+        cols['session_date'].append(date_ordinal(session.get('date')))
+        cols['session_plan'].append(intern(session.get('plan_id', ''), plan_ids, plan_index))
+        cols['session_logs'].append(len(cols['log_session']))
+        session_ids.append(session.get('session_id', ''))
+
+        for ex in session.get('exercises', []):
+            log_idx = len(cols['log_session'])
+            ex_idx = intern(ex['exercise_id'], exercise_ids, exercise_index)
+            if ex_idx == len(logs_by_exercise):
+                logs_by_exercise.append([])
+            logs_by_exercise[ex_idx].append(log_idx)
+
+            cols['log_session'].append(session_idx)
+            cols['log_exercise'].append(ex_idx)
+            cols['log_name'].append(intern(ex.get('name', ''), names, name_index))
+            cols['log_sets'].append(len(cols['set_weight']))
+            if ex.get('notes'):
+                notes[str(log_idx)] = ex['notes']
+            stats = ex['stats']
+            for key in ('volume', 'avg_weight', 'avg_reps', 'top_weight', 'e1rm'):
+                cols['stat_' + key].append(stats[key])
+            cols['stat_top_reps'].append(max(0, min(0xFFFF, int(stats['top_reps']))))
+            for s in ex.get('sets', []):
+                cols['set_weight'].append(float(s.get('weight', 0)))
+                cols['set_reps'].append(max(0, min(0xFFFF, int(s.get('reps', 0)))))
+
+    cols['session_logs'].append(len(cols['log_session']))
+    cols['log_sets'].append(len(cols['set_weight']))
+    for log_ids in logs_by_exercise:
+        cols['exercise_logs'].append(len(cols['exercise_log_ids']))
+        cols['exercise_log_ids'].extend(log_ids)
+    cols['exercise_logs'].append(len(cols['exercise_log_ids']))
+
+    ids_blob = dumps_compact({'exercise_ids': exercise_ids, 'plan_ids': plan_ids, 'names': names}).encode('utf-8')
+    details_blob = dumps_compact({'session_ids': session_ids, 'notes': notes}).encode('utf-8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, 0 if sys.byteorder == 'little' else 1,
+            len(cols['session_date']), len(cols['log_session']), len(cols['set_weight']), len(exercise_ids),
+            len(ids_blob), len(details_blob)
+        ))
+        for blob in [cols[name].tobytes() for name, _, _ in COLUMNS] + [ids_blob, details_blob]:
+            f.write(blob)
+            f.write(b'\0' * (_aligned(len(blob)) - len(blob)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# --- Reader ---
+
+# Read-only view over a columnar history file. Columns are memoryviews straight into the
+# mmap, so opening costs nothing per set and aggregations never build per-set dicts.
+class ColumnarFile:
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        self._details = None
+
+        magic, version, byteorder, n_sessions, n_logs, n_sets, n_exercises, ids_len, details_len = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported history file: {path}")
+        native = byteorder == (0 if sys.byteorder == 'little' else 1)
+
+        counts = {'sessions': n_sessions, 'logs': n_logs, 'sets': n_sets, 'exercises': n_exercises}
+        base = memoryview(self._mmap)
+        self._views.append(base)
+        offset = HEADER.size
+        for name, code, length_key in COLUMNS:
+            size = _column_length(length_key, counts) * array(code).itemsize
+            raw = base[offset:offset + size]
+            if native:
+                column = raw.cast(code)
+                self._views.extend([raw, column])
+            else:
+                column = array(code, raw.tobytes())
+                column.byteswap()
+                raw.release()
+            setattr(self, name, column)
+            offset += _aligned(size)
+
+        ids = json.loads(bytes(base[offset:offset + ids_len]).decode('utf-8'))
+        self._details_range = (offset + _aligned(ids_len), offset + _aligned(ids_len) + details_len)
+        self.exercise_ids = ids['exercise_ids']
+        self.plan_ids = ids['plan_ids']
+        self.names = ids['names']
+        self.exercise_index = {ex_id: i for i, ex_id in enumerate(self.exercise_ids)}
+        self.session_count = n_sessions
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    def details(self):
+        # Session ids and notes are only decoded when a full log or session is rebuilt
+        if self._details is None:
+            start, end = self._details_range
+            self._details = json.loads(self._mmap[start:end].decode('utf-8'))
+        return self._details
+
+    def exercise_log_range(self, exercise_id):
+        ex_idx = self.exercise_index.get(exercise_id)
+        if ex_idx is None:
+            return range(0)
+        return range(self.exercise_logs[ex_idx], self.exercise_logs[ex_idx + 1])
+
+    def log_stats(self, log_idx):
+        return {
+            'volume': round(self.stat_volume[log_idx], 2),
+            'avg_weight': round(self.stat_avg_weight[log_idx], 2),
+            'avg_reps': round(self.stat_avg_reps[log_idx], 2),
+            'top_weight': round(self.stat_top_weight[log_idx], 3),
+            'top_reps': self.stat_top_reps[log_idx],
+            'e1rm': round(self.stat_e1rm[log_idx], 2),
+        }
+
+    def log_set_count(self, log_idx):
+        return self.log_sets[log_idx + 1] - self.log_sets[log_idx]
+
+    def log_date(self, log_idx):
+        return self.session_date[self.log_session[log_idx]]
+
+    def log_sets_list(self, log_idx):
+        start, end = self.log_sets[log_idx], self.log_sets[log_idx + 1]
+        # float32 storage, rounded back so 2.3 kg does not come back as 2.299999952
+        return [{'weight': round(self.set_weight[i], 3), 'reps': self.set_reps[i]} for i in range(start, end)]
+
+    def log_dict(self, log_idx, exercise_id):
+        return {
+            'exercise_id': exercise_id,
+            'name': self.names[self.log_name[log_idx]],
+            'date': date_str(self.log_date(log_idx)),
+            'sets': self.log_sets_list(log_idx),
+            'notes': self.details()['notes'].get(str(log_idx), ''),
+            'stats': self.log_stats(log_idx),
+        }
+
+    def sessions(self):
+        # Rebuilds every session as dicts; only used when the file itself is rewritten
+        session_ids = self.details()['session_ids']
+        result = []
+        for session_idx in range(self.session_count):
+            logs = []
+            for log_idx in range(self.session_logs[session_idx], self.session_logs[session_idx + 1]):
+                log = self.log_dict(log_idx, self.exercise_ids[self.log_exercise[log_idx]])
+                del log['date']
+                logs.append(log)
+            result.append({
+                'session_id': session_ids[session_idx],
+                'date': date_str(self.session_date[session_idx]),
+                'plan_id': self.plan_ids[self.session_plan[session_idx]],
+                'exercises': logs,
+            })
+        return result
+
+
+# --- History Backend ---
+
+# Workout history kept in a memory-mapped columnar file, plus a short JSON lines tail of
+# sessions logged since the file was last rewritten. Logged sessions are queried from memory
+# at once, while the files are written through submit(func, *args) on a writer thread.
+# Rewrites (imports, deleted plans, a full tail) run there too: until one has finished, the
+# old mapping is read with the deleted plans skipped, then the new one is swapped in.
+class ColumnarHistory:
+    def __init__(self, path, submit=None):
+        self.path = path
+        self.tail_path = path + '.tail'
+        self.base = ColumnarFile(path) if os.path.exists(path) else None
+        self.tail = []
+        try:
+            with open(self.tail_path, 'r') as f:
+                for line in f:
+                    try:
+                        # Tail lines can predate the current log layout
+                        self.tail.append(migrate_session(json.loads(line)))
+                    except json.JSONDecodeError:
+                        break # Torn final write
+        except FileNotFoundError:
+            pass
+        self.tail_written = len(self.tail) # sessions in the tail file
+        self.excluded = set() # deleted plan ids still in the mapped file
+        self.writes = PendingWrites(submit)
+        self._tail_file = None # only used by the writer
+        self._finished = [] # (rewrite, new mapping) pairs handed over by the writer
+        self._retired = [] # replaced mappings, closed once no pending write can read them
+        self._lock = threading.Lock()
+
+    def close(self):
+        # After the writer thread has finished
+        self._adopt()
+        if self._tail_file is not None:
+            self._tail_file.close()
+            self._tail_file = None
+        for base in self._retired + ([self.base] if self.base is not None else []):
+            base.close()
+        self._retired = []
+        self.base = None
+
+    def _write_files(self, sessions):
+        if self._tail_file is not None:
+            self._tail_file.close()
+            self._tail_file = None
+        write_columnar(self.path, sessions)
+        write_atomic(self.tail_path, '')
+
+    def _queue_rewrite(self):
+        # The writer rebuilds the files from what is visible now, the new tail file starts empty
+        self.tail_written = 0
+        self.writes.run(self._rewrite_files, self.base, (list(self.tail), frozenset(self.excluded)))
+        self._adopt()
+
+    def _adopt(self):
+        # On the main thread: the newest finished rewrite becomes the mapping, and the tail
+        # sessions and deleted plans it holds are dropped from the tail and the exclusions
+        with self._lock:
+            finished, self._finished = self._finished, []
+        if finished:
+            (tail, excluded), base = finished[-1]
+            if self.base is not None:
+                self._retired.append(self.base)
+            self._retired.extend(mapping for _, mapping in finished[:-1])
+            self.base = base
+            written = {id(session) for session in tail}
+            self.tail = [s for s in self.tail if id(s) not in written]
+            self.excluded -= excluded
+        if self._retired and not self.writes.count:
+            for base in self._retired:
+                base.close()
+            self._retired = []
+
+    def _excluded_plans(self, base):
+        return {i for i, plan_id in enumerate(base.plan_ids) if plan_id in self.excluded}
+
+    def compact(self):
+        self._adopt()
+        self._queue_rewrite()
+
+    # --- Writes ---
+
+    def _append_tail(self, session):
+        if self._tail_file is None:
+            self._tail_file = open(self.tail_path, 'a')
+        self._tail_file.write(dumps_compact(session) + '\n')
+        self._tail_file.flush()
+
+    def _rewrite_files(self, base, rewrite):
+        # On the writer: the files are rewritten while queries go on reading the old mapping,
+        # which stays valid after it is replaced, and the new one is handed back for _adopt()
+        tail, excluded = rewrite
+        sessions = [s for s in base.sessions() if s['plan_id'] not in excluded] if base is not None else []
+        self._write_files(sessions + tail)
+        mapping = ColumnarFile(self.path)
+        with self._lock:
+            self._finished.append((rewrite, mapping))
+
+    def add_session(self, session):
+        self._adopt()
+        self.tail.append(session)
+        self.tail_written += 1
+        if self.tail_written >= COLUMNAR_TAIL_LIMIT:
+            self._queue_rewrite()
+        else:
+            self.writes.run(self._append_tail, session)
+
+    def import_sessions(self, sessions):
+        # Queryable from the tail at once; sessions already present (by session_id) are skipped
+        self._adopt()
+        known = set(self.base.details()['session_ids']) if self.base is not None else set()
+        known.update(s.get('session_id') for s in self.tail)
+        for session in sessions:
+            if session.get('session_id') not in known:
+                known.add(session.get('session_id'))
+                self.tail.append(session)
+        self._queue_rewrite()
+
+    def delete_plan_sessions(self, plan_id):
+        self._adopt()
+        tail = [s for s in self.tail if s.get('plan_id') != plan_id]
+        in_base = self.base is not None and plan_id in self.base.plan_ids
+        if len(tail) == len(self.tail) and not in_base:
+            return
+        self.tail = tail
+        if in_base:
+            self.excluded.add(plan_id)
+        self._queue_rewrite()
+
+    # --- Queries ---
+
+    def get_last_workout_date(self):
+        self._adopt()
+        dates = [s.get('date', '') for s in self.tail]
+        if self.base is not None:
+            base = self.base
+            excluded = self._excluded_plans(base)
+            for session_idx in range(base.session_count - 1, -1, -1):
+                if base.session_plan[session_idx] not in excluded:
+                    dates.append(date_str(base.session_date[session_idx]))
+                    break
+        return max(dates, default=None)
+
+    def scan(self, exercise_ids=None, plan_ids=None, start=None, end=None, newest_first=False, limit=None, with_sets=False):
+        # LogRows for query.Query: the mapped file's logs merged by date with the tail's, where
+        # same-day tail logs count as later. Only rows that are returned get decoded.
+        self._adopt()
+        tail = self._scan_tail(exercise_ids, plan_ids, start, end, newest_first, with_sets)
+        if self.base is None:
+            rows = iter(tail)
+        else:
+            base = self._scan_base(exercise_ids, plan_ids, start, end, newest_first, with_sets)
+            rows = heapq.merge(*([tail, base] if newest_first else [base, tail]),
+                               key=lambda row: row.date, reverse=newest_first) if tail else base
+        return limited(rows, limit)
+
+    def _scan_base(self, exercise_ids, plan_ids, start, end, newest_first, with_sets):
+        base = self.base
+        lo = date_ordinal(start) if start else 0
+        hi = date_ordinal(end) if end else sys.maxsize
+        if exercise_ids is None:
+            # Sessions are stored in date order, so a date range is one contiguous run of logs
+            first = bisect.bisect_left(base.session_date, lo)
+            last = bisect.bisect_right(base.session_date, hi)
+            log_ids = range(base.session_logs[first], base.session_logs[last])
+            walks = [reversed(log_ids) if newest_first else log_ids]
+        else:
+            walks = []
+            for ex_id in exercise_ids:
+                log_range = base.exercise_log_range(ex_id)
+                walks.append(base.exercise_log_ids[i] for i in (reversed(log_range) if newest_first else log_range))
+        plans = None
+        if plan_ids is not None or self.excluded:
+            plans = {i for i, plan_id in enumerate(base.plan_ids)
+                     if (plan_ids is None or plan_id in plan_ids) and plan_id not in self.excluded}
+        log_ids = walks[0] if len(walks) == 1 else heapq.merge(
+            *walks, key=lambda log_idx: (base.log_date(log_idx), log_idx), reverse=newest_first)
+
+        for log_idx in log_ids:
+            day = base.log_date(log_idx)
+            # Per-exercise walks are date ordered too, so they stop at the far end of the range
+            if day < lo:
+                if newest_first: break
+                continue
+            if day > hi:
+                if newest_first: continue
+                break
+            if not base.log_set_count(log_idx): continue
+            session_plan = base.session_plan[base.log_session[log_idx]]
+            if plans is not None and session_plan not in plans: continue
+            yield LogRow(
+                base.exercise_ids[base.log_exercise[log_idx]], date_str(day), base.plan_ids[session_plan],
+                base.names[base.log_name[log_idx]], base.log_stats(log_idx),
+                base.log_sets_list(log_idx) if with_sets else None,
+                base.details()['notes'].get(str(log_idx), '') if with_sets else None,
+            )
+
+    def _scan_tail(self, exercise_ids, plan_ids, start, end, newest_first, with_sets):
+        rows = []
+        for session in sorted(self.tail, key=lambda s: s.get('date', '')):
+            day = session.get('date', '')
+            if plan_ids is not None and session.get('plan_id', '') not in plan_ids: continue
+            if start and day < start or end and day > end: continue
+            for ex in session.get('exercises', []):
+                if not ex.get('sets'): continue
+                if exercise_ids is not None and ex['exercise_id'] not in exercise_ids: continue
+                rows.append(LogRow(ex['exercise_id'], day, session.get('plan_id', ''), ex.get('name', ''), ex['stats'],
+                                   ex['sets'] if with_sets else None, ex.get('notes', '') if with_sets else None))
+        return rows[::-1] if newest_first else rows
+
+    def get_set_table(self):
+        self._adopt()
+        return self._set_table(self.base, self.tail, self.excluded)
+
+    def read_set_table(self, done):
+        # done(table) is called on the writer; as a pending write it keeps the mapping open
+        self._adopt()
+        self.writes.run(self._read_set_table, done, self.base, list(self.tail), frozenset(self.excluded))
+
+    def _read_set_table(self, done, base, tail, excluded):
+        done(self._set_table(base, tail, excluded))
+
+    @staticmethod
+    def _set_table(base, tail, excluded):
+        # The analytics columns are copied straight from the mapped ones, then the tail appended
+        table = SetTable()
+        if excluded:
+            # Only until the rewrite that drops the deleted plans has finished
+            table.add_sessions(s for s in base.sessions() if s['plan_id'] not in excluded)
+        elif base is not None:
+            table.exercise_ids = list(base.exercise_ids)
+            table.exercise_index = dict(base.exercise_index)
+            table.log_exercise = array('i', base.log_exercise)
+            table.log_date = array('i', [base.session_date[s] for s in base.log_session])
+            table.log_sets = array('I', base.log_sets)
+            table.set_weight = array('d', base.set_weight)
+            table.set_reps = array('i', base.set_reps)
+        table.add_sessions(tail)
+        return table
@@ -0,0 +1,179 @@
+# history.py
+import bisect
+import heapq
+import itertools
+import math
+
+from query import LogRow, limited
+
+
+def estimate_1rm(weight, reps):
+    # Epley formula
+    return weight if reps <= 1 else weight * (1 + reps / 30)
+
+def estimate_1rm_brzycki(weight, reps):
+    # Brzycki formula; it breaks down from 37 reps, so those sets estimate nothing
+    if reps <= 1:
+        return weight
+    return weight * 36 / (37 - reps) if reps < 37 else 0
+
+def log_stats(sets):
+    # Per-log aggregates for the progress graphs, computed once when a session is finalized
+    # and stored on the log as 'stats' (older logs get them from migrations.py)
+    if not sets:
+        return {'avg_weight': 0, 'avg_reps': 0, 'volume': 0, 'top_weight': 0, 'top_reps': 0, 'e1rm': 0}
+    weights = [s.get('weight', 0) for s in sets]
+    reps = [s.get('reps', 0) for s in sets]
+    top_weight, top_reps = max(zip(weights, reps))
+    return {
+        'avg_weight': round(sum(weights) / len(sets), 2),
+        'avg_reps': round(sum(reps) / len(sets), 2),
+        'volume': round(sum(w * r for w, r in zip(weights, reps)), 2),
+        'top_weight': top_weight,
+        'top_reps': top_reps,
+        'e1rm': round(max(estimate_1rm(w, r) for w, r in zip(weights, reps)), 2),
+    }
+
+
+# Workout sessions kept sorted by date. Inserts use bisect on a parallel list of dates, so
+# the newest session, date ranges and the last N sessions are all O(log n) lookups. Every
+# mutator keeps the two lists in step, and the ones that would place a session out of date
+# order raise TypeError instead.
+class SessionList(list):
+    def __init__(self, sessions=()):
+        super().__init__()
+        self._dates = []
+        self._reset(sessions)
+
+    def _materialize(self):
+        pass # Overridden by the lazily loaded history
+
+    def _reset(self, sessions):
+        ordered = sorted(sessions, key=lambda s: s.get('date', ''))
+        list.clear(self)
+        list.extend(self, ordered)
+        self._dates = [s.get('date', '') for s in ordered]
+
+    def append(self, session):
+        # Same-day sessions stay in the order they were added
+        date = session.get('date', '')
+        i = bisect.bisect_right(self._dates, date)
+        self._dates.insert(i, date)
+        list.insert(self, i, session)
+
+    def insert(self, index, session):
+        # Only where the session's date already belongs, append() finds that place itself
+        date = session.get('date', '')
+        index = min(max(0, index + len(self._dates)) if index < 0 else index, len(self._dates))
+        if ((index and self._dates[index - 1] > date) or
+                (index < len(self._dates) and self._dates[index] < date)):
+            raise TypeError("SessionList.insert() would break its date order, add sessions with append()")
+        self._dates.insert(index, date)
+        list.insert(self, index, session)
+
+    def extend(self, sessions):
+        for session in sessions:
+            self.append(session)
+
+    def __iadd__(self, sessions):
+        self.extend(sessions)
+        return self
+
+    def pop(self, index=-1):
+        session = list.pop(self, index)
+        self._dates.pop(index)
+        return session
+
+    def remove(self, session):
+        del self[list.index(self, session)]
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        del self._dates[index]
+
+    def clear(self):
+        list.clear(self)
+        self._dates = []
+
+    def remove_plan(self, plan_id):
+        self._materialize()
+        self._reset([s for s in list.__iter__(self) if s.get('plan_id') != plan_id])
+
+    def latest(self):
+        self._materialize()
+        return list.__getitem__(self, -1) if self._dates else None
+
+    def last_date(self):
+        self._materialize()
+        return self._dates[-1] if self._dates else None
+
+    def between(self, start, end):
+        # Sessions dated start..end inclusive, as ISO date strings
+        self._materialize()
+        lo = bisect.bisect_left(self._dates, start)
+        hi = bisect.bisect_right(self._dates, end)
+        return list.__getitem__(self, slice(lo, hi))
+
+    def last(self, n):
+        self._materialize()
+        return list.__getitem__(self, slice(max(0, len(self._dates) - n), None))
+
+def _out_of_order(name):
+    def method(self, *args, **kwargs):
+        raise TypeError(f"SessionList.{name}() would break its date order, add sessions with append()")
+    method.__name__ = name
+    return method
+
+for _name in ('__setitem__', '__imul__', 'sort', 'reverse'):
+    setattr(SessionList, _name, _out_of_order(_name))
+
+
+# Per-exercise index over the JSON workout history. Each exercise maps to a date-ordered list
+# of (date, seq, plan id, log) entries; seq keeps same-day logs in the order they were added.
+class ExerciseHistoryIndex:
+    def __init__(self, sessions=()):
+        self._entries = {}  # exercise id -> [(date, seq, plan id, log)]
+        self._by_plan = {}  # plan id -> [(exercise id, date, seq)]
+        self._seq = itertools.count()
+        for session in sessions:
+            self.add_session(session)
+
+    def add_session(self, session):
+        date = session.get('date', '')
+        plan_id = session.get('plan_id', '')
+        plan_keys = self._by_plan.setdefault(plan_id, [])
+        for log in session.get('exercises', []):
+            if not log.get('sets'): continue
+            ex_id = log['exercise_id']
+            seq = next(self._seq)
+            bisect.insort(self._entries.setdefault(ex_id, []), (date, seq, plan_id, log))
+            plan_keys.append((ex_id, date, seq))
+
+    def remove_plan(self, plan_id):
+        for ex_id, date, seq in self._by_plan.pop(plan_id, []):
+            entries = self._entries[ex_id]
+            i = bisect.bisect_left(entries, (date, seq))
+            if i < len(entries) and entries[i][1] == seq:
+                del entries[i]
+
+    def scan(self, exercise_ids=None, plan_ids=None, start=None, end=None, newest_first=False, limit=None, with_sets=False):
+        # LogRows for query.Query. The date range is cut out of each exercise's list with bisect
+        # and several exercises are merged on (date, seq), walking indices so nothing is copied.
+        if exercise_ids is None:
+            lists = list(self._entries.values())
+        else:
+            lists = [self._entries[ex_id] for ex_id in exercise_ids if ex_id in self._entries]
+        walks = []
+        for ex_entries in lists:
+            lo = bisect.bisect_left(ex_entries, (start,)) if start else 0
+            hi = bisect.bisect_right(ex_entries, (end, math.inf)) if end else len(ex_entries)
+            indices = range(hi - 1, lo - 1, -1) if newest_first else range(lo, hi)
+            walks.append(map(ex_entries.__getitem__, indices))
+        if not walks:
+            return
+        entries = walks[0] if len(walks) == 1 else heapq.merge(*walks, reverse=newest_first)
+        if plan_ids is not None:
+            entries = (entry for entry in entries if entry[2] in plan_ids)
+        for date, seq, plan_id, log in limited(entries, limit):
+            yield LogRow(log['exercise_id'], date, plan_id, log.get('name', ''), log['stats'],
+                         log['sets'] if with_sets else None, log.get('notes', '') if with_sets else None)
@@ -0,0 +1,250 @@
+# history_db.py
+import itertools
+import sqlite3
+import uuid
+
+from analytics import SetTable, date_ordinal
+from history import log_stats
+from query import LogRow
+from storage import PendingWrites
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    plan_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_sessions_plan ON sessions(plan_id);
+
+CREATE TABLE IF NOT EXISTS exercise_logs (
+    log_id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    exercise_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT,
+    notes TEXT,
+    set_count INTEGER NOT NULL,
+    volume REAL NOT NULL,
+    avg_weight REAL,
+    avg_reps REAL,
+    top_weight REAL,
+    top_reps INTEGER,
+    e1rm REAL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_exercise_date ON exercise_logs(exercise_id, date);
+CREATE INDEX IF NOT EXISTS idx_logs_session ON exercise_logs(session_id);
+
+CREATE TABLE IF NOT EXISTS sets (
+    log_id INTEGER NOT NULL REFERENCES exercise_logs(log_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    PRIMARY KEY (log_id, position)
+);
+'''
+
+
+# Precomputed per-log aggregates, added to exercise_logs after the first schema version
+STATS_COLUMNS = ('avg_weight', 'avg_reps', 'top_weight', 'top_reps', 'e1rm')
+
+# Query groupings as SQL; weeks start on Monday, as in query.week_start()
+GROUP_SQL = {
+    None: 'NULL',
+    'exercise': 'l.exercise_id',
+    'plan': 's.plan_id',
+    'date': 'l.date',
+    'week': "date(l.date, '-6 days', 'weekday 1')",
+    'month': 'substr(l.date, 1, 7)',
+}
+
+
+# Workout history stored in SQLite, with exercise logs indexed on (exercise_id, date).
+# Sessions logged while the app runs are written through submit(func, *args) on a writer
+# thread, with a connection of its own; in WAL mode its commits and the reads here do not
+# block each other.
+class SqliteHistory:
+    def __init__(self, path, submit=None):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+        self._add_stats_columns()
+        self.conn.commit()
+        self.writes = PendingWrites(submit)
+        self._writer = None
+
+    def _add_stats_columns(self):
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(exercise_logs)')}
+        missing = [c for c in STATS_COLUMNS if c not in columns]
+        if not missing: return
+        for column in missing:
+            column_type = 'INTEGER' if column == 'top_reps' else 'REAL'
+            self.conn.execute(f'ALTER TABLE exercise_logs ADD COLUMN {column} {column_type}')
+        # Backfill logs imported before the columns existed
+        for (log_id,) in self.conn.execute('SELECT log_id FROM exercise_logs').fetchall():
+            stats = log_stats(self._get_sets(log_id))
+            self.conn.execute(
+                'UPDATE exercise_logs SET avg_weight = ?, avg_reps = ?, top_weight = ?, top_reps = ?, e1rm = ? WHERE log_id = ?',
+                tuple(stats[c] for c in STATS_COLUMNS) + (log_id,)
+            )
+
+    def close(self):
+        # After the writer thread has finished
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.conn.close()
+
+    # --- Writes ---
+
+    def _writer_connection(self):
+        if self.writes.submit is None:
+            return self.conn
+        if self._writer is None:
+            # Opened on the writer thread, closed by close() on the main one
+            self._writer = sqlite3.connect(self.path, check_same_thread=False)
+            self._writer.execute('PRAGMA foreign_keys = ON')
+        return self._writer
+
+    def _commit(self, func, *args):
+        try:
+            with self._writer_connection() as conn:
+                func(conn, *args)
+        except sqlite3.Error as e:
+            print(f"WARNING: History write failed: {e}")
+
+    def _insert_session(self, conn, session):
+        session_id = session.get('session_id') or f"sess_{uuid.uuid4().hex[:16]}"
+        cur = conn.execute(
+            'INSERT OR IGNORE INTO sessions (session_id, date, plan_id) VALUES (?, ?, ?)',
+            (session_id, session.get('date', ''), session.get('plan_id', ''))
+        )
+        if cur.rowcount == 0:
+            return # Already imported
+
+        for position, ex in enumerate(session.get('exercises', [])):
+            ex_id = ex['exercise_id']
+            sets = ex.get('sets', [])
+            stats = ex['stats']
+            cur = conn.execute(
+                'INSERT INTO exercise_logs (session_id, position, exercise_id, date, name, notes, set_count, volume, '
+                'avg_weight, avg_reps, top_weight, top_reps, e1rm) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (session_id, position, ex_id, session.get('date', ''), ex.get('name', ''), ex.get('notes', ''), len(sets),
+                 stats['volume']) + tuple(stats[c] for c in STATS_COLUMNS)
+            )
+            log_id = cur.lastrowid
+            conn.executemany(
+                'INSERT INTO sets (log_id, position, weight, reps) VALUES (?, ?, ?, ?)',
+                [(log_id, i, s.get('weight', 0), s.get('reps', 0)) for i, s in enumerate(sets)]
+            )
+
+    def _delete_plan(self, conn, plan_id):
+        conn.execute('DELETE FROM sessions WHERE plan_id = ?', (plan_id,))
+
+    def add_session(self, session):
+        self.writes.run(self._commit, self._insert_session, session)
+
+    def import_sessions(self, sessions):
+        # One-time import of the data.json 'workout_sessions' list. Sessions already
+        # present (by session_id) are skipped, so an interrupted import can simply rerun.
+        with self.conn:
+            for session in sessions:
+                self._insert_session(self.conn, session)
+
+    def delete_plan_sessions(self, plan_id):
+        self.writes.run(self._commit, self._delete_plan, plan_id)
+
+    # --- Queries ---
+
+    def _get_sets(self, log_id):
+        rows = self.conn.execute(
+            'SELECT weight, reps FROM sets WHERE log_id = ? ORDER BY position', (log_id,)
+        )
+        return [{'weight': weight, 'reps': reps} for weight, reps in rows]
+
+    # Every read settles the writes first, so a session is found as soon as it was added
+
+    def get_last_workout_date(self):
+        self.writes.settle()
+        row = self.conn.execute('SELECT MAX(date) FROM sessions').fetchone()
+        return row[0] if row else None
+
+    def _where(self, exercise_ids, plan_ids, start, end):
+        clauses, params = ['l.set_count > 0'], []
+        if exercise_ids is not None:
+            clauses.append(f"l.exercise_id IN ({', '.join('?' * len(exercise_ids))})")
+            params.extend(exercise_ids)
+        if plan_ids is not None:
+            clauses.append(f"s.plan_id IN ({', '.join('?' * len(plan_ids))})")
+            params.extend(plan_ids)
+        if start is not None:
+            clauses.append('l.date >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('l.date <= ?')
+            params.append(end)
+        return ' AND '.join(clauses), params
+
+    def scan(self, exercise_ids=None, plan_ids=None, start=None, end=None, newest_first=False, limit=None, with_sets=False):
+        # LogRows for query.Query, filtered, ordered and limited by SQLite on the (exercise_id, date)
+        # index. Sets are only read, per returned log, when asked for.
+        self.writes.settle()
+        where, params = self._where(exercise_ids, plan_ids, start, end)
+        order = 'DESC' if newest_first else 'ASC'
+        query = (
+            'SELECT l.log_id, l.exercise_id, l.date, s.plan_id, l.name, l.notes, l.volume, '
+            'l.avg_weight, l.avg_reps, l.top_weight, l.top_reps, l.e1rm '
+            'FROM exercise_logs l JOIN sessions s ON s.session_id = l.session_id '
+            f'WHERE {where} ORDER BY l.date {order}, l.log_id {order}'
+        )
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        for log_id, exercise_id, date, plan_id, name, notes, *stats in self.conn.execute(query, params):
+            yield LogRow(exercise_id, date, plan_id, name, dict(zip(('volume',) + STATS_COLUMNS, stats)),
+                         self._get_sets(log_id) if with_sets else None, notes if with_sets else None)
+
+    def aggregate(self, field, how, by=None, exercise_ids=None, plan_ids=None, start=None, end=None):
+        # query.Query.aggregate() as one GROUP BY, with the same rounding as query.aggregate_rows()
+        self.writes.settle()
+        where, params = self._where(exercise_ids, plan_ids, start, end)
+        column = '1' if field == 'logs' else f'l.{field}'
+        value = 'COUNT(*)' if how == 'count' else f'{how.upper()}({column})'
+        key = GROUP_SQL[by]
+        rows = self.conn.execute(
+            f'SELECT {key}, {value} FROM exercise_logs l JOIN sessions s ON s.session_id = l.session_id '
+            f'WHERE {where} GROUP BY 1 ORDER BY 1', params
+        ).fetchall()
+        results = {group: round(result, 2) if how in ('sum', 'avg') else result for group, result in rows}
+        if by is None:
+            return results.get(None, 0)
+        return results
+
+    def get_set_table(self):
+        self.writes.settle()
+        return self._set_table(self.conn)
+
+    def read_set_table(self, done):
+        # done(table) is called on the writer, after the writes queued so far. Not counted as
+        # a pending write, so the reads here never wait for it.
+        if self.writes.submit is None:
+            done(self.get_set_table())
+        else:
+            self.writes.submit(self._read_set_table, done)
+
+    def _read_set_table(self, done):
+        done(self._set_table(self._writer_connection()))
+
+    def _set_table(self, conn):
+        # Every set of the history as analytics columns, read in a single query
+        table = SetTable()
+        rows = conn.execute(
+            'SELECT l.log_id, l.exercise_id, l.date, s.weight, s.reps FROM exercise_logs l '
+            'JOIN sets s ON s.log_id = l.log_id ORDER BY l.log_id, s.position'
+        )
+        for (log_id, exercise_id, date), sets in itertools.groupby(rows, key=lambda row: row[:3]):
+            table.add_log(exercise_id, date_ordinal(date), (row[3:] for row in sets))
+        return table
@@ -0,0 +1,96 @@
+# kvcache.py
+import copyreg
+import glob
+import hashlib
+import importlib.util
+import io
+import marshal
+import os
+import pickle
+import types
+from functools import partial
+
+import kivy
+from kivy.factory import Factory
+from kivy.lang import Builder, Parser
+
+KV_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kv')
+# Part of every cache key, next to the KV source, the Kivy version and the bytecode format
+KV_CACHE_FORMAT = 1
+
+
+# Parsed rules hold compiled code objects, which pickle cannot store by itself; marshal can,
+# for the interpreter that wrote them, which is why the bytecode magic is in the cache key.
+def _reduce_code(code):
+    return marshal.loads, (marshal.dumps(code),)
+
+class _RulePickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[types.CodeType] = _reduce_code
+
+
+# Loads the kv/ files into the Builder, each at most once. A parsed and compiled file is
+# pickled to cache_dir under a hash of its source, so a file is only parsed again after it
+# changed (or Kivy or Python did).
+class KVLoader:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.loaded = set()
+
+    def load(self, name):
+        if name in self.loaded: return
+        self.loaded.add(name)
+        path = os.path.join(KV_DIR, name)
+        with open(path, 'rb') as f:
+            source = f.read()
+
+        key = hashlib.sha256(b'\0'.join([
+            source, kivy.__version__.encode(), importlib.util.MAGIC_NUMBER, str(KV_CACHE_FORMAT).encode()
+        ])).hexdigest()[:16]
+        stem = os.path.splitext(name)[0]
+        cache_path = os.path.join(self.cache_dir, f'{stem}-{key}.pickle')
+
+        parser = self._read_cache(cache_path)
+        if parser is None:
+            parser = Parser(content=source.decode('utf-8'), filename=path)
+            self._write_cache(cache_path, stem, parser)
+        else:
+            # Parsing runs the #:import and #:set directives; a cached parser has to run them itself
+            parser.execute_directives()
+        self._merge(parser, path)
+
+    def _read_cache(self, cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None # Missing, partly written or unreadable: parsed again and rewritten
+
+    def _write_cache(self, cache_path, stem, parser):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            buffer = io.BytesIO()
+            _RulePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(parser)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, cache_path)
+            # Entries for older versions of the same file are never read again
+            for old_path in glob.glob(os.path.join(self.cache_dir, glob.escape(stem) + '-*.pickle')):
+                if old_path != cache_path:
+                    os.remove(old_path)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"WARNING: KV cache not written for {stem}: {e}")
+
+    def _merge(self, parser, path):
+        # What Builder.load_string() does with a freshly parsed file, for rule-only files
+        if parser.root:
+            raise ValueError(f'The file <{path}> contains a root widget; kv/ files may only hold rules')
+        Builder.rules.extend(parser.rules)
+        Builder._clear_matchcache()
+        for name, cls, template in parser.templates:
+            Builder.templates[name] = (cls, template, path)
+            Factory.register(name, cls=partial(Builder.template, name), is_template=True, warn=True)
+        for name, baseclasses in parser.dynamic_classes.items():
+            Factory.register(name, baseclasses=baseclasses, filename=path, warn=True)
+        Builder.files.append(path)
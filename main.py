@@ -1,9 +1,9 @@
 # main.py
+from profiling import startup
 import kivy
 import json
 import uuid
 from datetime import datetime, timedelta
-import time
 import os
 
 from kivy.config import Config
@@ -12,9 +12,9 @@ from kivy.config import Config
 Config.set('graphics', 'width', '540')
 Config.set('graphics', 'height', '960')
 Config.set('graphics', 'resizable', False)
+startup.checkpoint('kivy_config')
 
 from kivy.app import App
-from kivy.lang import Builder
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.relativelayout import RelativeLayout
@@ -22,16 +22,32 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.modalview import ModalView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.progressbar import ProgressBar
 from kivy.properties import StringProperty, ListProperty, NumericProperty, ObjectProperty, DictProperty, BooleanProperty
-from kivy.clock import Clock
-from kivy.utils import get_color_from_hex
+from kivy.clock import Clock, mainthread
+from kivy.utils import get_color_from_hex, get_hex_from_color
 from kivy.core.window import Window
-from kivy.metrics import dp
-from kivy.graphics import Color, Rectangle, Line, RoundedRectangle
-from kivy.core.text import LabelBase
+from kivy.metrics import dp, sp
+from kivy.graphics import Color, Rectangle, Line, RoundedRectangle, InstructionGroup
+from kivy.core.text import LabelBase, Label as CoreLabel
+
+from storage import JournalStore, SessionCapture, load_snapshot
+from autosave import Autosaver, AUTOSAVE_PAUSE_TIMEOUT, RECORD_SECTIONS
+from columnar import ColumnarHistory
+from history import ExerciseHistoryIndex, SessionList, log_stats
+from registry import PlanRegistry
+from migrations import SCHEMA_VERSION, migrate
+from charting import ExerciseSeries, clip_to_window, date_ticks
+from analytics import ROLLING_WINDOW, SetTable, summarize
+from query import Query
+from records import RecordBook, describe
+from timers import TimerService
+from kvcache import KVLoader
+from tracing import trace
+startup.checkpoint('imports')
 
 # --- Font Registration ---
 # On EndeavourOS, you can install the font using: paru -S ttf-jetbrains-mono
@@ -45,6 +61,7 @@ try:
 except (OSError, IOError):
     print("WARNING: JetBrains Mono font not found. Falling back to default.")
     DEFAULT_FONT = 'Roboto'
+startup.checkpoint('fonts')
 
 # --- Color and Style Definitions (Dark Mode) ---
 BG_COLOR = get_color_from_hex('#121212')
@@ -57,739 +74,24 @@ DANGER_COLOR = get_color_from_hex('#FF3B30')
 SUCCESS_COLOR = get_color_from_hex('#34C759')
 GREEN_COLOR = get_color_from_hex('#32D74B')
 RED_COLOR = get_color_from_hex('#FF453A')
+RECORD_COLOR = get_color_from_hex('#FFD60A')
 RADIUS = dp(12)
 
+# --- Storage Configuration ---
+# 'journal' appends one small record per mutation and periodically compacts it into data.json.
+# 'json' rewrites data.json, re-serializing only the sections that changed.
+# Both are written by the background autosaver a few seconds after the last edit.
+STORAGE_MODE = os.environ.get('GYMAPP_STORAGE', 'journal')
+# 'json' keeps workout history inside data.json, 'sqlite' moves it into an indexed history.db,
+# 'columnar' into a compact memory-mapped history.bin.
+HISTORY_BACKEND = os.environ.get('GYMAPP_HISTORY', 'json')
+
+# --- Startup Configuration ---
+# Screens other than the plan list are built on first use. With prewarming on, the ones still
+# unbuilt are then constructed one per frame shortly after the first frame is drawn.
+PREWARM_SCREENS = os.environ.get('GYMAPP_PREWARM', '1') == '1'
+PREWARM_DELAY = 1.0
 
-# --- Kivy Design Language String ---
-# NOTE: This has been overhauled for better mobile proportions and aesthetics.
-KV = f'''
-#:import get_color_from_hex kivy.utils.get_color_from_hex
-#:import datetime datetime
-#:import dp kivy.metrics.dp
-#:import ACCENT_COLOR __main__.ACCENT_COLOR
-#:import PRIMARY_COLOR __main__.PRIMARY_COLOR
-#:import DANGER_COLOR __main__.DANGER_COLOR
-#:import SUCCESS_COLOR __main__.SUCCESS_COLOR
-#:import SURFACE_COLOR __main__.SURFACE_COLOR
-#:import TEXT_COLOR __main__.TEXT_COLOR
-#:import MUTED_TEXT_COLOR __main__.MUTED_TEXT_COLOR
-#:import RADIUS __main__.RADIUS
-
-# --- Base Widget Styles ---
-<Label>:
-    color: {TEXT_COLOR}
-    font_size: '16sp'
-    font_name: '{DEFAULT_FONT}'
-    markup: True
-
-<Button>:
-    background_color: 0, 0, 0, 0
-    background_normal: ''
-    color: {ACCENT_COLOR}
-    font_size: '16sp'
-    font_name: '{DEFAULT_FONT}'
-    canvas.before:
-        Color:
-            rgba: {PRIMARY_COLOR}
-        RoundedRectangle:
-            pos: self.pos
-            size: self.size
-            radius: [RADIUS]
-
-<TextInput>:
-    background_color: 0, 0, 0, 0
-    background_normal: ''
-    background_active: ''
-    foreground_color: {TEXT_COLOR}
-    cursor_color: {ACCENT_COLOR}
-    padding: [dp(15), dp(10), dp(15), dp(10)]
-    font_name: '{DEFAULT_FONT}'
-    canvas.before:
-        Color:
-            rgba: {PRIMARY_COLOR}
-        RoundedRectangle:
-            pos: self.pos
-            size: self.size
-            radius: [RADIUS]
-        Color:
-            rgba: {ACCENT_COLOR} if self.focus else (0,0,0,0)
-        Line:
-            rounded_rectangle: (self.x, self.y, self.width, self.height, RADIUS)
-            width: 1.5
-
-<Spinner>:
-    background_color: 0, 0, 0, 0
-    background_normal: ''
-    color: {TEXT_COLOR}
-    font_name: '{DEFAULT_FONT}'
-    canvas.before:
-        Color:
-            rgba: {PRIMARY_COLOR}
-        RoundedRectangle:
-            pos: self.pos
-            size: self.size
-            radius: [RADIUS]
-
-<ProgressBar>:
-    size_hint_y: None
-    height: dp(6)
-    
-# --- Custom Widgets ---
-<ConfirmationPopup>:
-    size_hint: 0.8, None
-    height: dp(200)
-    background_color: 0,0,0,0
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(20)
-        canvas.before:
-            Color:
-                rgba: {SURFACE_COLOR}
-            RoundedRectangle:
-                pos: self.pos
-                size: self.size
-                radius: [RADIUS]
-        Label:
-            id: message_label
-            text: 'Are you sure?'
-            font_size: '18sp'
-            halign: 'center'
-            valign: 'middle'
-            text_size: self.width, None
-        BoxLayout:
-            size_hint_y: None
-            height: dp(50)
-            spacing: dp(10)
-            Button:
-                text: 'Cancel'
-                on_press: root.dismiss()
-            Button:
-                id: confirm_button
-                text: 'Confirm'
-                on_press: root.dispatch('on_confirm')
-                canvas.before:
-                    Color:
-                        rgba: {DANGER_COLOR}
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [RADIUS]
-                color: get_color_from_hex('#FFFFFF')
-
-<RestTimerPopup>:
-    size_hint: 0.8, None
-    height: dp(250)
-    background_color: 0,0,0,0
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(10)
-        canvas.before:
-            Color:
-                rgba: SURFACE_COLOR
-            RoundedRectangle:
-                pos: self.pos
-                size: self.size
-                radius: [RADIUS]
-        Label:
-            text: 'Manage Rest Timer'
-            font_size: '20sp'
-            bold: True
-            size_hint_y: None
-            height: dp(40)
-        GridLayout:
-            cols: 2
-            spacing: dp(10)
-            Button:
-                text: 'Resume'
-                on_press: root.screen.resume_rest_timer(); root.dismiss()
-            Button:
-                text: '+15s'
-                on_press: root.screen.add_to_rest_timer(15)
-            Button:
-                text: 'Restart'
-                on_press: root.screen.start_rest_timer(); root.dismiss()
-            Button:
-                text: 'Skip Rest'
-                on_press: root.screen.stop_rest_timer(); root.dismiss()
-                canvas.before:
-                    Color:
-                        rgba: DANGER_COLOR
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [RADIUS]
-                color: get_color_from_hex('#FFFFFF')
-
-<PlanListItem>:
-    size_hint_y: None
-    height: dp(60)
-    spacing: dp(10)
-    is_editing: False
-    Button:
-        id: main_button
-        text: 'Plan'
-    
-    BoxLayout:
-        size_hint_x: None
-        width: dp(120) if root.is_editing else 0
-        opacity: 1 if root.is_editing else 0
-        disabled: not root.is_editing
-        spacing: dp(5)
-        Button:
-            id: move_up_button
-            text: '▲'
-        Button:
-            id: move_down_button
-            text: '▼'
-        Button:
-            id: delete_button
-            text: 'X'
-            canvas.before:
-                Color:
-                    rgba: {DANGER_COLOR}
-                RoundedRectangle:
-                    pos: self.pos
-                    size: self.size
-                    radius: [RADIUS]
-            color: get_color_from_hex('#FFFFFF')
-
-<ExerciseListItem>:
-    size_hint_y: None
-    height: dp(60)
-    spacing: dp(10)
-    is_complete: False
-    is_editing: False
-    Button:
-        id: main_button
-        text: 'Exercise'
-        color: SUCCESS_COLOR if root.is_complete else ACCENT_COLOR
-    
-    BoxLayout:
-        size_hint_x: None
-        width: dp(120) if root.is_editing else 0
-        opacity: 1 if root.is_editing else 0
-        disabled: not root.is_editing
-        spacing: dp(5)
-        Button:
-            id: move_up_button
-            text: '▲'
-        Button:
-            id: move_down_button
-            text: '▼'
-        Button:
-            id: delete_button
-            text: 'X'
-            canvas.before:
-                Color:
-                    rgba: {DANGER_COLOR}
-                RoundedRectangle:
-                    pos: self.pos
-                    size: self.size
-                    radius: [RADIUS]
-            color: get_color_from_hex('#FFFFFF')
-
-<SetEntry>:
-    size_hint_y: None
-    height: dp(50)
-    spacing: dp(10)
-    set_number: 0
-    can_be_removed: True
-    Label:
-        text: f"Set {{root.set_number}}"
-        size_hint_x: 0.2
-    TextInput:
-        id: weight_input
-        hint_text: 'Weight'
-        input_filter: 'float'
-        multiline: False
-    Label:
-        text: "x"
-        size_hint_x: 0.1
-    TextInput:
-        id: reps_input
-        hint_text: 'Reps'
-        input_filter: 'int'
-        multiline: False
-    Button:
-        text: '-'
-        size_hint_x: 0.15
-        on_press: app.root.get_screen('active_workout_screen').remove_set(root)
-        canvas.before:
-            Color:
-                rgba: {DANGER_COLOR} if self.disabled == False else {PRIMARY_COLOR}
-            RoundedRectangle:
-                pos: self.pos
-                size: self.size
-                radius: [RADIUS]
-        color: {get_color_from_hex('#FFFFFF')} if self.disabled == False else {MUTED_TEXT_COLOR}
-        disabled: not root.can_be_removed
-
-<PureKivyGraph>:
-    padding: [dp(35), dp(20), dp(10), dp(30)] 
-    dual_axis_padding: [dp(35), dp(35), dp(35), dp(35)]
-
-# --- Screen Definitions ---
-<Screen>:
-    canvas.before:
-        Color:
-            rgba: {BG_COLOR}
-        Rectangle:
-            pos: self.pos
-            size: self.size
-
-<PlanSelectScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(10)
-        Label:
-            text: 'GymApp'
-            font_size: '34sp'
-            bold: True
-            size_hint_y: None
-            height: dp(60)
-        ScrollView:
-            bar_width: 0 
-            effect_cls: 'ScrollEffect'
-            BoxLayout:
-                id: plan_list
-                orientation: 'vertical'
-                size_hint_y: None
-                height: self.minimum_height
-                spacing: dp(10)
-        BoxLayout:
-            size_hint_y: None
-            height: dp(50)
-            spacing: dp(10)
-            Label:
-                id: last_workout_label
-                text: 'Days since last workout: N/A'
-                font_size: '14sp'
-                color: {MUTED_TEXT_COLOR}
-                # AESTHETIC FIX: Allow text to wrap and shorten to prevent overflow
-                text_size: self.width, None
-                halign: 'left'
-                valign: 'middle'
-                shorten: True
-            Button:
-                text: 'Edit'
-                on_press: root.toggle_edit_mode()
-                id: edit_button
-                size_hint_x: 0.3
-            Button:
-                text: '+'
-                font_size: '30sp'
-                size_hint_x: 0.2 if root.is_editing else 0
-                opacity: 1 if root.is_editing else 0
-                disabled: not root.is_editing
-                on_press: root.manager.current = 'workout_plan_screen'; root.manager.get_screen('workout_plan_screen').load_plan(new_plan=True)
-
-<WorkoutPlanScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(15)
-        # AESTHETIC FIX: Header layout adjusted for better balance
-        GridLayout:
-            cols: 3
-            size_hint_y: None
-            height: dp(60)
-            spacing: dp(10)
-            Button:
-                text: '<'
-                size_hint_x: 0.2
-                on_press: root.go_back_to_plans()
-            RelativeLayout:
-                Label:
-                    id: plan_title_label
-                    text: plan_title_input.text
-                    font_size: '24sp' # Reduced font size to prevent overflow
-                    bold: True
-                    opacity: 1 if not root.is_editing else 0
-                    halign: 'center'
-                    valign: 'middle'
-                    text_size: self.width, None
-                    shorten: True
-                TextInput:
-                    id: plan_title_input
-                    text: 'Workout Plan'
-                    font_size: '24sp'
-                    bold: True
-                    multiline: False
-                    disabled: not root.is_editing
-                    on_text_validate: root.rename_plan(self.text)
-                    halign: 'center'
-                    opacity: 1 if root.is_editing else 0
-            Widget:
-                size_hint_x: 0.2
-        
-        ScrollView:
-            bar_width: 0
-            effect_cls: 'ScrollEffect'
-            BoxLayout:
-                id: exercise_list_in_plan
-                orientation: 'vertical'
-                size_hint_y: None
-                height: self.minimum_height
-                spacing: dp(10)
-        
-        # AESTHETIC FIX: Use AnchorLayout to reliably pin buttons to the bottom
-        AnchorLayout:
-            anchor_x: 'center'
-            anchor_y: 'bottom'
-            size_hint_y: 0.2
-            BoxLayout:
-                orientation: 'vertical'
-                size_hint_y: None
-                height: self.minimum_height
-                spacing: dp(10)
-                Button:
-                    id: add_exercise_button
-                    text: '+ Add Exercise'
-                    font_size: '18sp'
-                    size_hint_y: None
-                    height: dp(50)
-                    opacity: 1 if root.is_editing else 0
-                    disabled: not root.is_editing
-                    on_press: root.manager.current = 'exercise_creation_screen'
-
-                BoxLayout:
-                    size_hint_y: None
-                    height: dp(50)
-                    spacing: dp(10)
-                    Button:
-                        id: edit_mode_button
-                        text: 'Edit Plan' if not root.is_editing else 'Done Editing'
-                        on_press: root.toggle_edit_mode()
-                    Button:
-                        id: workout_control_button
-                        text: 'Start Workout'
-                        on_press: root.toggle_workout_mode()
-
-<ExerciseCreationScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(15)
-        BoxLayout:
-            size_hint_y: None
-            height: dp(60)
-            Button:
-                text: '<'
-                font_size: '24sp'
-                bold: True
-                size_hint_x: 0.2
-                on_press: root.manager.current = 'workout_plan_screen'
-            Label:
-                text: 'Add Exercise'
-                font_size: '24sp'
-                bold: True
-        # AESTHETIC FIX: Made input fields have fixed height for consistency
-        TextInput:
-            id: exercise_name_input
-            hint_text: 'Exercise Name'
-            size_hint_y: None
-            height: dp(50)
-        Spinner:
-            id: primary_spinner
-            text: 'Primary Muscle'
-            size_hint_y: None
-            height: dp(50)
-        Spinner:
-            id: secondary_spinner
-            text: 'Secondary Muscle (Optional)'
-            size_hint_y: None
-            height: dp(50)
-        TextInput:
-            id: rest_time_input
-            hint_text: 'Rest Time (seconds), e.g. 60'
-            input_filter: 'int'
-            size_hint_y: None
-            height: dp(50)
-        Widget: # Spacer
-            size_hint_y: 0.1
-        BoxLayout:
-            size_hint_y: None
-            height: dp(50)
-            spacing: dp(10)
-            Button:
-                text: 'Save'
-                on_press: root.save_exercise()
-            Button:
-                text: 'Cancel'
-                on_press: root.manager.current = 'workout_plan_screen'
-
-<ExerciseDetailScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(10)
-        GridLayout:
-            cols: 3
-            size_hint_y: None
-            height: dp(60)
-            spacing: dp(10)
-            Button:
-                text: '<'
-                size_hint_x: 0.2
-                on_press: root.go_back()
-            RelativeLayout:
-                Label:
-                    id: exercise_title_label
-                    text: exercise_title_input.text
-                    font_size: '24sp'
-                    bold: True
-                    opacity: 1 if not root.is_editing else 0
-                    halign: 'center'
-                    valign: 'middle'
-                    text_size: self.width, None
-                    shorten: True
-                TextInput:
-                    id: exercise_title_input
-                    text: 'Exercise'
-                    font_size: '24sp'
-                    bold: True
-                    multiline: False
-                    disabled: not root.is_editing
-                    halign: 'center'
-                    opacity: 1 if root.is_editing else 0
-            Widget:
-                size_hint_x: 0.2
-        
-        # AESTHETIC FIX: Edit view now has fixed height elements
-        BoxLayout:
-            size_hint_y: 1 if root.is_editing else 0
-            opacity: 1 if root.is_editing else 0
-            disabled: not root.is_editing
-            orientation: 'vertical'
-            spacing: dp(10)
-            padding: [0, dp(15), 0, 0]
-            Label:
-                text: 'Primary Muscle'
-                size_hint_y: None
-                height: dp(20)
-                halign: 'left'
-                text_size: self.width, None
-            Spinner:
-                id: primary_spinner
-                text: 'Primary Muscle'
-                size_hint_y: None
-                height: dp(50)
-            Label:
-                text: 'Secondary Muscle'
-                size_hint_y: None
-                height: dp(20)
-                halign: 'left'
-                text_size: self.width, None
-            Spinner:
-                id: secondary_spinner
-                text: 'Secondary Muscle'
-                size_hint_y: None
-                height: dp(50)
-            Label:
-                text: 'Default Rest Time (s)'
-                size_hint_y: None
-                height: dp(20)
-                halign: 'left'
-                text_size: self.width, None
-            TextInput:
-                id: rest_time_input
-                hint_text: 'Rest Time (s)'
-                input_filter: 'int'
-                size_hint_y: None
-                height: dp(50)
-            Widget: # Spacer
-
-        # AESTHETIC FIX: Graph view now has explicit size hints
-        BoxLayout:
-            orientation: 'vertical'
-            size_hint_y: 1 if not root.is_editing else 0
-            opacity: 1 if not root.is_editing else 0
-            disabled: root.is_editing
-            spacing: dp(5)
-            Label:
-                text: 'Avg. Weight (Red) & Reps (Green)'
-                size_hint_y: 0.1
-                font_size: '14sp'
-                color: {MUTED_TEXT_COLOR}
-            PureKivyGraph:
-                id: weight_reps_graph
-                is_dual_axis: True
-                size_hint_y: 0.4
-            Label:
-                text: 'Total Volume Progression'
-                size_hint_y: 0.1
-                font_size: '14sp'
-                color: {MUTED_TEXT_COLOR}
-            PureKivyGraph:
-                id: volume_graph
-                size_hint_y: 0.4
-        
-        BoxLayout:
-            size_hint_y: None
-            height: dp(60)
-            padding: [0, dp(10), 0, 0]
-            spacing: dp(10)
-            Button:
-                id: edit_button
-                text: 'Edit Exercise' if not root.is_editing else 'Cancel'
-                on_press: root.toggle_edit_mode()
-            Button:
-                id: save_button
-                text: 'Save Changes'
-                opacity: 1 if root.is_editing else 0
-                disabled: not root.is_editing
-                on_press: root.save_changes()
-                canvas.before:
-                    Color:
-                        rgba: {SUCCESS_COLOR}
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [RADIUS]
-
-<ActiveWorkoutScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(10)
-        
-        ProgressBar:
-            id: volume_progress_bar
-            max: 1
-            value: 0
-        
-        GridLayout:
-            cols: 3
-            size_hint_y: None
-            height: dp(60)
-            Button:
-                text: '<'
-                size_hint_x: 0.2
-                on_press: root.confirm_finish_exercise()
-            Label:
-                id: active_exercise_title
-                text: 'Active Workout'
-                font_size: '24sp'
-                bold: True
-                halign: 'center'
-                valign: 'middle'
-                text_size: self.width, None
-                shorten: True
-            Widget:
-                size_hint_x: 0.2
-        
-        ScrollView:
-            id: set_scroll
-            bar_width: 0
-            effect_cls: 'ScrollEffect'
-            GridLayout:
-                id: set_list
-                cols: 1
-                size_hint_y: None
-                height: self.minimum_height
-                spacing: dp(10)
-
-        # AESTHETIC FIX: Bottom controls have fixed height to avoid being pushed off screen
-        BoxLayout:
-            orientation: 'vertical'
-            size_hint_y: None
-            height: self.minimum_height
-            spacing: dp(10)
-            padding: [0, dp(10), 0, 0]
-
-            TextInput:
-                id: exercise_notes_input
-                hint_text: 'Notes for this exercise...'
-                size_hint_y: None
-                height: dp(80)
-                multiline: True
-            
-            Button:
-                text: '+ Add Set'
-                size_hint_y: None
-                height: dp(50)
-                on_press: root.add_set()
-
-            BoxLayout:
-                size_hint_y: None
-                height: dp(50)
-                spacing: dp(10)
-                
-                Button:
-                    id: rest_timer_button
-                    text: root.rest_timer_text
-                    color: get_color_from_hex('#FFFFFF') if root.is_resting else ACCENT_COLOR
-                    on_press: root.open_rest_timer_options() if root.is_resting else root.start_rest_timer()
-                    canvas.before:
-                        Color:
-                            rgba: ACCENT_COLOR if root.is_resting else PRIMARY_COLOR
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [RADIUS]
-                
-                Button:
-                    text: 'Finish Exercise'
-                    on_press: root.confirm_finish_exercise()
-                    canvas.before:
-                        Color:
-                            rgba: SUCCESS_COLOR
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [RADIUS]
-
-<WorkoutSummaryScreen>:
-    BoxLayout:
-        orientation: 'vertical'
-        padding: dp(20)
-        spacing: dp(10)
-        Label:
-            text: 'Workout Summary'
-            font_size: '34sp'
-            bold: True
-            size_hint_y: None
-            height: dp(60)
-        
-        ScrollView:
-            bar_width: 0
-            GridLayout:
-                id: summary_layout
-                cols: 1
-                size_hint_y: None
-                height: self.minimum_height
-                spacing: dp(15)
-        
-        BoxLayout:
-            size_hint_y: None
-            height: dp(50)
-            spacing: dp(10)
-            Button:
-                text: 'Cancel'
-                on_press: root.cancel_finish()
-                canvas.before:
-                    Color:
-                        rgba: DANGER_COLOR
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [RADIUS]
-                color: get_color_from_hex('#FFFFFF')
-            Button:
-                text: 'Confirm & Save'
-                on_press: root.confirm_finish()
-                canvas.before:
-                    Color:
-                        rgba: SUCCESS_COLOR
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [RADIUS]
-                color: get_color_from_hex('#FFFFFF')
-'''
 
 # --- Python Logic ---
 
@@ -804,17 +106,120 @@ class ConfirmationPopup(ModalView):
 class RestTimerPopup(ModalView):
     screen = ObjectProperty(None)
 
+# --- List Reconciliation ---
+# Any structural change to a RecycleView's data makes it re-sync every visible row, so list
+# updates are diffed against the current rows first and only what differs is written back.
+
+def patch_row(rv, index, row):
+    # Updates one row in place and re-syncs its view if it is on screen, without a relayout
+    rv.data[index].update(row)
+    view = rv.view_adapter.get_visible_view(index)
+    if view is not None:
+        rv.view_adapter.refresh_view_attrs(index, rv.data[index], view)
+
+def reconcile_rows(rv, rows, key):
+    current = rv.data
+    if [r[key] for r in current] == [r[key] for r in rows]:
+        # Same rows in the same order, e.g. toggling edit mode or completing an exercise
+        for i, (old, new) in enumerate(zip(current, rows)):
+            if old != new:
+                patch_row(rv, i, new)
+        return
+
+    # Inserted, removed or moved rows: replace only the window between the common head and tail
+    start = 0
+    while start < min(len(current), len(rows)) and current[start] == rows[start]:
+        start += 1
+    end_old, end_new = len(current), len(rows)
+    while end_old > start and end_new > start and current[end_old - 1] == rows[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    if end_old - start == end_new - start:
+        current[start:end_old] = rows[start:end_new]
+    elif end_old == start:
+        for i in range(start, end_new):
+            current.insert(i, rows[i])
+    elif end_new == start:
+        del current[start:end_old]
+    else:
+        rv.data = rows # RecycleView can't apply a resizing slice assignment incrementally
+
+
+# List rows are recycled by RecycleView: everything a row shows comes from its data dict
 class PlanListItem(BoxLayout):
+    plan_id = StringProperty('')
+    text = StringProperty('')
     is_editing = BooleanProperty(False)
 
 class ExerciseListItem(BoxLayout):
+    exercise_id = StringProperty('')
+    text = StringProperty('')
     is_complete = BooleanProperty(False)
     is_editing = BooleanProperty(False)
 
-class SetEntry(BoxLayout):
+def parse_set(row):
+    # (weight, reps) typed into a set row, empty fields counting as 0; None while unparseable
+    try:
+        return float(row['weight'] or 0), int(row['reps'] or 0)
+    except ValueError:
+        return None
+
+def compare_set(parsed, previous):
+    # Text and color comparing a set row with the same set of the last session: that set while
+    # the row is empty, otherwise the difference in volume
+    if previous is None:
+        return '', MUTED_TEXT_COLOR
+    if not parsed or not parsed[0] * parsed[1]:
+        return f"{previous['weight']:g}x{previous['reps']}", MUTED_TEXT_COLOR
+    delta = round(parsed[0] * parsed[1] - previous['weight'] * previous['reps'], 1)
+    if not delta:
+        return '=', MUTED_TEXT_COLOR
+    return f"{delta:+g}", GREEN_COLOR if delta > 0 else RED_COLOR
+
+class SetEntry(RecycleDataViewBehavior, BoxLayout):
+    index = None
     set_number = NumericProperty(0)
     can_be_removed = BooleanProperty(True)
-
+    weight = StringProperty('')
+    reps = StringProperty('')
+    comparison = StringProperty('')
+    comparison_color = ListProperty(MUTED_TEXT_COLOR)
+    is_record = BooleanProperty(False)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def update_field(self, field, text):
+        # Typed values go back into the row data, the widget itself may be reused for another set
+        setattr(self, field, text)
+        if self.index is not None:
+            row = App.get_running_app().root.get_screen('active_workout_screen').update_set(self.index, field, text)
+            if row is not None:
+                self.comparison, self.comparison_color = row['comparison'], row['comparison_color']
+                self.is_record = row['is_record']
+
+# Tick label textures shared by every graph, rendered once per (text, size) and tinted by a
+# Color instruction at draw time. Cleared when full, since tick values change with the data.
+LABEL_TEXTURE_CACHE_SIZE = 256
+_label_textures = {}
+
+def get_label_texture(text, font_size):
+    key = (text, font_size)
+    texture = _label_textures.get(key)
+    if texture is None:
+        if len(_label_textures) >= LABEL_TEXTURE_CACHE_SIZE:
+            _label_textures.clear()
+        label = CoreLabel(text=text, font_size=font_size, font_name=DEFAULT_FONT)
+        label.refresh()
+        texture = _label_textures[key] = label.texture
+    return texture
+
+# Retained-mode graph: all canvas instructions are created once in __init__ and only their
+# points, positions and textures are changed afterwards, so redraws allocate no widgets.
+# update_plot() draws a fixed list of points against numbered ticks; set_series() switches to
+# a time axis over a whole DecimatedSeries, which can be panned by dragging and zoomed with
+# a pinch or the mouse wheel (double tap resets the view).
 class PureKivyGraph(FloatLayout):
     points1 = ListProperty([])
     points2 = ListProperty([])
@@ -824,12 +229,61 @@ class PureKivyGraph(FloatLayout):
     y_min2 = NumericProperty(0)
     y_max2 = NumericProperty(10)
     x_max = NumericProperty(4)
+
+    time_axis = BooleanProperty(False)
+    series1 = ObjectProperty(None, allownone=True)
+    series2 = ObjectProperty(None, allownone=True)
+    view_start = NumericProperty(0) # Visible window on the time axis, as date ordinals
+    view_end = NumericProperty(0)
+
+    NUM_Y_TICKS = 4
+    NUM_TIME_TICKS = 5
+    MIN_VIEW_DAYS = 7
+    ZOOM_STEP = 1.25
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self._visible = False
+        self._groups = []
+        self._graph_rect = (0, 0, 0, 0)
+        self._data_range = (0, 0)
+        self._touches = []
+
+        frame = InstructionGroup()
+        frame.add(Color(*MUTED_TEXT_COLOR))
+        self._frame = Line(rectangle=(0, 0, 0, 0), width=1.1)
+        frame.add(self._frame)
+        frame.add(Color(0.3, 0.3, 0.3, 0.5))
+        self._grid_lines = [Line(points=[], width=1, dash_offset=2, dash_length=2) for _ in range(self.NUM_Y_TICKS + 1)]
+        for line in self._grid_lines:
+            frame.add(line)
+
+        labels = InstructionGroup()
+        self._y_label_colors = {1: Color(*RED_COLOR), 2: Color(*GREEN_COLOR)}
+        self._y_labels = {}
+        for axis_index in (1, 2):
+            labels.add(self._y_label_colors[axis_index])
+            self._y_labels[axis_index] = [Rectangle(size=(0, 0)) for _ in range(self.NUM_Y_TICKS + 1)]
+            for rect in self._y_labels[axis_index]:
+                labels.add(rect)
+        self._x_label_group = InstructionGroup()
+        self._x_label_group.add(Color(*MUTED_TEXT_COLOR))
+        self._x_labels = []
+        labels.add(self._x_label_group)
+
+        plot = InstructionGroup()
+        self._plot_colors = {1: Color(*ACCENT_COLOR), 2: Color(*GREEN_COLOR)}
+        self._plot_lines = {1: Line(points=[], width=1.8), 2: Line(points=[], width=1.8)}
+        for axis_index in (1, 2):
+            plot.add(self._plot_colors[axis_index])
+            plot.add(self._plot_lines[axis_index])
+
+        self._groups = [(self.canvas.before, frame), (self.canvas, labels), (self.canvas.after, plot)]
         self.bind(pos=self.draw_graph, size=self.draw_graph)
 
     def update_plot(self, **kwargs):
+        self.time_axis = False
+        self.series1 = self.series2 = None
         self.points1 = kwargs.get('points1', [])
         self.y_min1 = kwargs.get('y_min1', 0)
         self.y_max1 = kwargs.get('y_max1', 100)
@@ -842,11 +296,97 @@ class PureKivyGraph(FloatLayout):
 
         self.draw_graph()
 
-    def draw_graph(self, *args):
-        self.canvas.before.clear()
-        self.canvas.after.clear()
-        self.clear_widgets()
+    def set_series(self, series1, series2=None):
+        self.time_axis = True
+        self.series1 = series1
+        self.series2 = series2
+        self.reset_view()
+
+    def reset_view(self):
+        start, end = self.series1.x_range() if self.series1 is not None else (0, 0)
+        # Some room either side so the first and last sessions aren't drawn on the frame
+        pad = max(1, (end - start) * 0.02, (self.MIN_VIEW_DAYS - (end - start)) / 2)
+        self._data_range = (start - pad, end + pad)
+        self.view_start, self.view_end = self._data_range
+        self.draw_graph()
+
+    # --- Zoom and Pan ---
+
+    def zoom(self, factor, anchor_x):
+        # factor > 1 zooms in, keeping the date under anchor_x (window coordinates) in place
+        gx, gy, gw, gh = self._graph_rect
+        if gw <= 1: return
+        span = self.view_end - self.view_start
+        anchor = self.view_start + span * min(1, max(0, (anchor_x - gx) / gw))
+        new_span = span / factor
+        self._set_view(anchor - (anchor - self.view_start) / factor, new_span)
+
+    def pan(self, dx):
+        gx, gy, gw, gh = self._graph_rect
+        if gw <= 1: return
+        span = self.view_end - self.view_start
+        self._set_view(self.view_start - dx / gw * span, span)
+
+    def _set_view(self, start, span):
+        lo, hi = self._data_range
+        span = min(max(span, self.MIN_VIEW_DAYS), hi - lo)
+        start = min(max(start, lo), hi - span)
+        if (start, start + span) != (self.view_start, self.view_end):
+            self.view_start, self.view_end = start, start + span
+            self.draw_graph()
+
+    def on_touch_down(self, touch):
+        if not self.time_axis or not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        if touch.is_mouse_scrolling:
+            if touch.button in ('scrolldown', 'scrollup'):
+                self.zoom(self.ZOOM_STEP if touch.button == 'scrolldown' else 1 / self.ZOOM_STEP, touch.x)
+            return True
+        if touch.is_double_tap:
+            self.reset_view()
+            return True
+        touch.grab(self)
+        self._touches.append(touch)
+        return True
+
+    def on_touch_move(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_move(touch)
+        if len(self._touches) == 1:
+            self.pan(touch.dx)
+        elif len(self._touches) == 2:
+            other = self._touches[0] if self._touches[1] is touch else self._touches[1]
+            before = abs(touch.px - other.x)
+            if before > dp(10):
+                self.zoom(abs(touch.x - other.x) / before, (touch.x + other.x) / 2)
+        return True
+
+    def on_touch_up(self, touch):
+        if touch.grab_current is not self:
+            return super().on_touch_up(touch)
+        touch.ungrab(self)
+        if touch in self._touches:
+            self._touches.remove(touch)
+        return True
+
+    # --- Drawing ---
+
+    def _set_visible(self, visible):
+        if visible == self._visible: return
+        self._visible = visible
+        for canvas, group in self._groups:
+            if visible:
+                canvas.add(group)
+            else:
+                canvas.remove(group)
 
+    def _place_label(self, rect, text, font_size, center_x, center_y):
+        texture = get_label_texture(text, font_size)
+        rect.texture = texture
+        rect.size = texture.size
+        rect.pos = (int(center_x - texture.width / 2), int(center_y - texture.height / 2))
+
+    def draw_graph(self, *args):
         pad_l, pad_t, pad_r, pad_b = self.padding
         if self.is_dual_axis:
             pad_l1, pad_r1, pad_l2, pad_r2 = self.dual_axis_padding
@@ -858,66 +398,86 @@ class PureKivyGraph(FloatLayout):
         graph_w = self.width - pad_l - pad_r
         graph_h = self.height - pad_t - pad_b
 
-        if graph_w <= 1 or graph_h <= 1: return
+        if graph_w <= 1 or graph_h <= 1:
+            self._set_visible(False)
+            return
+        self._set_visible(True)
+        self._graph_rect = (graph_x, graph_y, graph_w, graph_h)
+        if self.time_axis:
+            self._load_view(graph_w)
 
-        with self.canvas.before:
-            # Color(*PRIMARY_COLOR) # Optional: background for the graph area
-            # Rectangle(pos=(graph_x, graph_y), size=(graph_w, graph_h))
-            Color(*MUTED_TEXT_COLOR)
-            Line(rectangle=(graph_x, graph_y, graph_w, graph_h), width=1.1)
+        self._frame.rectangle = (graph_x, graph_y, graph_w, graph_h)
 
         self._draw_y_axis(graph_x, graph_y, graph_w, graph_h, 1)
         if self.is_dual_axis:
             self._draw_y_axis(graph_x, graph_y, graph_w, graph_h, 2)
+        else:
+            for rect in self._y_labels[2]:
+                rect.size = (0, 0)
         
         self._draw_x_axis(graph_x, graph_y, graph_w, graph_h)
         
-        with self.canvas.after:
-            self._draw_plot_line(graph_x, graph_y, graph_w, graph_h, 1)
-            if self.is_dual_axis:
-                self._draw_plot_line(graph_x, graph_y, graph_w, graph_h, 2)
+        self._draw_plot_line(graph_x, graph_y, graph_w, graph_h, 1)
+        if self.is_dual_axis:
+            self._draw_plot_line(graph_x, graph_y, graph_w, graph_h, 2)
+        else:
+            self._plot_lines[2].points = []
+
+    def _load_view(self, graph_w):
+        # At most one point per pixel column is drawn, whatever the length of the history
+        max_points = max(2, int(graph_w))
+        for axis_index, series in ((1, self.series1), (2, self.series2 if self.is_dual_axis else None)):
+            xs, ys = [], []
+            if series is not None:
+                xs, ys = series.view(self.view_start, self.view_end, max_points)
+                xs, ys = clip_to_window(xs, ys, self.view_start, self.view_end)
+            setattr(self, f'points{axis_index}', list(zip(xs, ys)))
+            setattr(self, f'y_min{axis_index}', min(ys) * 0.9 if ys else 0)
+            setattr(self, f'y_max{axis_index}', max(ys) * 1.1 if ys else 1)
+
+    def _x_window(self):
+        if self.time_axis:
+            return self.view_start, (self.view_end - self.view_start) or 1
+        return 0, self.x_max or 1
 
     def _draw_y_axis(self, gx, gy, gw, gh, axis_index):
         y_min = getattr(self, f'y_min{axis_index}')
         y_max = getattr(self, f'y_max{axis_index}')
-        color = RED_COLOR if axis_index == 1 else GREEN_COLOR
         
         y_range = y_max - y_min
         if y_range == 0: y_range = 1
-        num_y_ticks = 4
+        num_y_ticks = self.NUM_Y_TICKS
         
-        for i in range(num_y_ticks + 1):
+        for i, rect in enumerate(self._y_labels[axis_index]):
             val = y_min + (y_range / num_y_ticks) * i
             y = gy + (i / num_y_ticks) * gh
             
             if axis_index == 1:
-                with self.canvas.before:
-                    Color(0.3, 0.3, 0.3, 0.5)
-                    Line(points=[gx, y, gx + gw, y], width=1, dash_offset=2, dash_length=2)
+                self._grid_lines[i].points = [gx, y, gx + gw, y]
             
             label_x = self.x if axis_index == 1 else self.right - self.dual_axis_padding[3]
-            halign = 'right' if axis_index == 1 else 'left'
-            
-            label = Label(
-                text=f"{val:.1f}", font_size='10sp', color=color,
-                size_hint=(None, None), size=(dp(35), dp(20)),
-                pos=(label_x, y - dp(10)), halign=halign, valign='center', font_name=DEFAULT_FONT
-            )
-            self.add_widget(label)
+            self._place_label(rect, f"{val:.1f}", sp(10), label_x + dp(35) / 2, y)
 
     def _draw_x_axis(self, gx, gy, gw, gh):
-        x_range = self.x_max
-        if x_range == 0: x_range = 1
-        num_x_ticks = int(self.x_max) + 1
+        x0, x_range = self._x_window()
+        if self.time_axis:
+            ticks = date_ticks(self.view_start, self.view_end, self.NUM_TIME_TICKS)
+        else:
+            ticks = [(i, f"#{i+1}") for i in range(int(self.x_max) + 1)]
+
+        # Label rectangles are only added when a plot needs more ticks than ever before
+        while len(self._x_labels) < len(ticks):
+            rect = Rectangle(size=(0, 0))
+            self._x_labels.append(rect)
+            self._x_label_group.add(rect)
         
-        for i in range(num_x_ticks):
-            x = gx + (i / x_range) * gw if x_range > 0 else gx
-            label = Label(
-                text=f"#{i+1}", font_size='12sp', color=MUTED_TEXT_COLOR,
-                size_hint=(None, None), size=(dp(40), dp(20)),
-                pos=(x - dp(20), self.y), halign='center', valign='top', font_name=DEFAULT_FONT
-            )
-            self.add_widget(label)
+        for i, rect in enumerate(self._x_labels):
+            if i >= len(ticks):
+                rect.size = (0, 0)
+                continue
+            tick_x, text = ticks[i]
+            x = gx + ((tick_x - x0) / x_range) * gw
+            self._place_label(rect, text, sp(12), x, self.y + dp(10))
 
     def _draw_plot_line(self, gx, gy, gw, gh, axis_index):
         points = getattr(self, f'points{axis_index}')
@@ -925,21 +485,20 @@ class PureKivyGraph(FloatLayout):
         y_max = getattr(self, f'y_max{axis_index}')
         color = RED_COLOR if axis_index == 1 else GREEN_COLOR
         if not self.is_dual_axis: color = ACCENT_COLOR
+        self._plot_colors[axis_index].rgba = color
+
+        x0, x_range = self._x_window()
+        y_range = y_max - y_min
+        if y_range == 0: y_range = 1
+
+        plot_points = []
+        for x_val, y_val in points:
+            px = gx + ((x_val - x0) / x_range) * gw
+            py = gy + ((y_val - y_min) / y_range) * gh
+            plot_points.extend([px, py])
+        
+        self._plot_lines[axis_index].points = plot_points
 
-        if points:
-            Color(*color)
-            x_range = self.x_max
-            if x_range == 0: x_range = 1
-            y_range = y_max - y_min
-            if y_range == 0: y_range = 1
-
-            plot_points = []
-            for x_val, y_val in points:
-                px = gx + (x_val / x_range) * gw if x_range > 0 else gx
-                py = gy + ((y_val - y_min) / y_range) * gh
-                plot_points.extend([px, py])
-            
-            Line(points=plot_points, width=1.8)
 
 class PlanSelectScreen(Screen):
     is_editing = BooleanProperty(False)
@@ -952,12 +511,11 @@ class PlanSelectScreen(Screen):
 
     def update_last_workout_label(self):
         app = App.get_running_app()
-        sessions = app.data.get('workout_sessions', [])
-        if not sessions:
+        latest_date_str = app.get_last_workout_date()
+        if not latest_date_str:
             self.ids.last_workout_label.text = 'No workouts logged yet'
             return
 
-        latest_date_str = max(s['date'] for s in sessions)
         latest_date = datetime.strptime(latest_date_str, '%Y-%m-%d')
         days_since = (datetime.today() - latest_date).days
 
@@ -969,17 +527,13 @@ class PlanSelectScreen(Screen):
             self.ids.last_workout_label.text = f'Days since last workout: {days_since}'
 
     def populate_plans(self):
-        self.ids.plan_list.clear_widgets()
-        for plan in App.get_running_app().data['plans']:
-            item = PlanListItem(is_editing=self.is_editing)
-            item.ids.main_button.text = plan['name']
-            item.ids.main_button.bind(on_press=lambda instance, p_id=plan['id']: self.select_plan(p_id))
-            item.ids.delete_button.bind(on_press=lambda instance, p_id=plan['id']: self.confirm_delete_plan(p_id))
-            item.ids.move_up_button.bind(on_press=lambda instance, p_id=plan['id']: self.move_plan(p_id, -1))
-            item.ids.move_down_button.bind(on_press=lambda instance, p_id=plan['id']: self.move_plan(p_id, 1))
-            self.ids.plan_list.add_widget(item)
+        reconcile_rows(self.ids.plan_list, [
+            {'plan_id': plan['id'], 'text': plan['name'], 'is_editing': self.is_editing}
+            for plan in App.get_running_app().data['plans']
+        ], 'plan_id')
 
     def select_plan(self, plan_id):
+        trace.event('select_plan', plan_id=plan_id)
         self.manager.current = 'workout_plan_screen'
         self.manager.get_screen('workout_plan_screen').load_plan(plan_id=plan_id)
 
@@ -1002,15 +556,9 @@ class PlanSelectScreen(Screen):
 
     def move_plan(self, plan_id, direction):
         app = App.get_running_app()
-        plans = app.data['plans']
-        idx = next((i for i, p in enumerate(plans) if p['id'] == plan_id), -1)
-        
-        if idx != -1:
-            new_idx = idx + direction
-            if 0 <= new_idx < len(plans):
-                plans.insert(new_idx, plans.pop(idx))
-                # No need to save here, will be saved on_stop
-                self.populate_plans()
+        if app.registry.move_plan(plan_id, direction):
+            app.record('reorder_plans', order=[p['id'] for p in app.data['plans']])
+            self.populate_plans()
 
 
 class WorkoutPlanScreen(Screen):
@@ -1018,15 +566,15 @@ class WorkoutPlanScreen(Screen):
     is_editing = BooleanProperty(False)
     is_workout_active = BooleanProperty(False)
     active_session_data = DictProperty({})
-    workout_timer_event = ObjectProperty(None, allownone=True)
-    start_time = NumericProperty(0)
+    workout_timer = ObjectProperty(None, allownone=True)
 
     def load_plan(self, plan_id=None, new_plan=False):
         app = App.get_running_app()
         if new_plan:
             new_id = f"plan_{uuid.uuid4().hex[:16]}"
             new_plan_data = {"id": new_id, "name": f"New Plan", "exercises": []}
-            app.data['plans'].append(new_plan_data)
+            app.registry.add_plan(new_plan_data)
+            app.record('add_plan', plan=new_plan_data)
             self.current_plan_id = new_id
             self.is_editing = True
         else:
@@ -1037,37 +585,28 @@ class WorkoutPlanScreen(Screen):
         self.update_view()
 
     def update_view(self):
-        plan = next((p for p in App.get_running_app().data['plans'] if p['id'] == self.current_plan_id), None)
+        plan = App.get_running_app().registry.plan(self.current_plan_id)
         if not plan: 
             self.manager.current = 'plan_select_screen'
             return
 
         self.ids.plan_title_input.text = plan['name']
         self.ids.plan_title_label.text = plan['name']
-        self.ids.exercise_list_in_plan.clear_widgets()
         
         # Populate exercises and check completion status
-        for exercise in plan['exercises']:
-            item = ExerciseListItem(is_editing=self.is_editing)
-            item.ids.main_button.text = f"{exercise['name']}"
-            item.ids.main_button.bind(on_press=lambda instance, ex=exercise: self.select_exercise(ex))
-            item.ids.delete_button.bind(on_press=lambda instance, ex_id=exercise['id']: self.confirm_delete_exercise(ex_id))
-            item.ids.move_up_button.bind(on_press=lambda instance, ex_id=exercise['id']: self.move_exercise(ex_id, -1))
-            item.ids.move_down_button.bind(on_press=lambda instance, ex_id=exercise['id']: self.move_exercise(ex_id, 1))
-
-            if self.is_workout_active:
-                ex_log = self.active_session_data.get('exercises', {}).get(exercise['id'])
-                if ex_log and ex_log.get('sets'):
-                    item.is_complete = True
-
-            self.ids.exercise_list_in_plan.add_widget(item)
+        logged = self.active_session_data.get('exercises', {}) if self.is_workout_active else {}
+        reconcile_rows(self.ids.exercise_list_in_plan, [
+            {
+                'exercise_id': exercise['id'],
+                'text': exercise['name'],
+                'is_editing': self.is_editing,
+                'is_complete': bool(logged.get(exercise['id'], {}).get('sets')),
+            }
+            for exercise in plan['exercises']
+        ], 'exercise_id')
         
         self.ids.edit_mode_button.text = 'Done Editing' if self.is_editing else 'Edit Plan'
         self.ids.workout_control_button.text = 'Start Workout'
-        self.ids.workout_control_button.canvas.before.clear()
-        with self.ids.workout_control_button.canvas.before:
-            Color(*PRIMARY_COLOR)
-            RoundedRectangle(pos=self.ids.workout_control_button.pos, size=self.ids.workout_control_button.size, radius=[RADIUS])
 
     def toggle_edit_mode(self):
         self.is_editing = not self.is_editing
@@ -1075,11 +614,17 @@ class WorkoutPlanScreen(Screen):
 
     def rename_plan(self, new_name):
         app = App.get_running_app()
-        plan = next((p for p in app.data['plans'] if p['id'] == self.current_plan_id), None)
+        plan = app.registry.plan(self.current_plan_id)
         if plan and new_name:
             plan['name'] = new_name
+            app.record('rename_plan', plan_id=plan['id'], name=new_name)
             self.ids.plan_title_label.text = new_name
 
+    def open_exercise(self, exercise_id):
+        exercise_data = App.get_running_app().registry.exercise(self.current_plan_id, exercise_id)
+        if exercise_data:
+            self.select_exercise(exercise_data)
+
     def select_exercise(self, exercise_data):
         if self.is_workout_active:
             self.manager.current = 'active_workout_screen'
@@ -1098,23 +643,21 @@ class WorkoutPlanScreen(Screen):
             self.start_workout()
     
     def start_workout(self):
+        trace.event('start_workout')
         self.active_session_data = {
             'plan_id': self.current_plan_id,
             'date': datetime.today().strftime('%Y-%m-%d'),
-            'exercises': {}
+            'exercises': {},
+            'records': {}, # exercise id -> records its logged sets beat, see RecordBook.log_records
         }
-        self.start_time = time.time()
-        self.workout_timer_event = Clock.schedule_interval(self.update_timer_display, 1)
-        self.ids.workout_control_button.canvas.before.clear()
-        with self.ids.workout_control_button.canvas.before:
-            Color(*DANGER_COLOR)
-            RoundedRectangle(pos=self.ids.workout_control_button.pos, size=self.ids.workout_control_button.size, radius=[RADIUS])
+        self.workout_timer = App.get_running_app().timers.stopwatch(self.update_timer_display)
         self.ids.edit_mode_button.disabled = True
 
     def stop_workout(self, session_data, save=True):
-        if self.workout_timer_event:
-            self.workout_timer_event.cancel()
-            self.workout_timer_event = None
+        trace.event('stop_workout', save=save)
+        if self.workout_timer:
+            self.workout_timer.cancel()
+            self.workout_timer = None
         
         if save and session_data:
             final_session = {
@@ -1123,29 +666,27 @@ class WorkoutPlanScreen(Screen):
                 'plan_id': session_data.get('plan_id', ''),
                 'exercises': [ex for ex in session_data.get('exercises', {}).values() if ex.get('sets')],
             }
+            for ex in final_session['exercises']:
+                ex['stats'] = log_stats(ex['sets'])
             if final_session['exercises']:
-                app = App.get_running_app()
-                app.data['workout_sessions'].append(final_session)
+                App.get_running_app().add_session(final_session)
 
         self.is_workout_active = False
         self.ids.edit_mode_button.disabled = False
         self.active_session_data = {}
         self.update_view()
+        # A recorded trace ends with its workout
+        trace.write(App.get_running_app().user_data_dir)
 
-    def update_timer_display(self, dt):
-        elapsed = time.time() - self.start_time
+    def update_timer_display(self, elapsed):
         mins, secs = divmod(elapsed, 60)
         self.ids.workout_control_button.text = f'Finish ({int(mins):02}:{int(secs):02})'
 
     def update_exercise_status(self, exercise_id, is_complete):
-        plan = next((p for p in App.get_running_app().data['plans'] if p['id'] == self.current_plan_id), None)
-        if not plan: return
-        exercise_data = next((e for e in plan['exercises'] if e['id'] == exercise_id), None)
-        if not exercise_data: return
-
-        for item in self.ids.exercise_list_in_plan.children:
-            if isinstance(item, ExerciseListItem) and item.ids.main_button.text == exercise_data['name']:
-                item.is_complete = is_complete
+        rv = self.ids.exercise_list_in_plan
+        for i, row in enumerate(rv.data):
+            if row['exercise_id'] == exercise_id:
+                patch_row(rv, i, {'is_complete': is_complete})
                 break
     
     def go_back_to_plans(self):
@@ -1179,25 +720,16 @@ class WorkoutPlanScreen(Screen):
 
     def delete_exercise(self, exercise_id):
         app = App.get_running_app()
-        for plan in app.data['plans']:
-            if plan['id'] == self.current_plan_id:
-                plan['exercises'] = [e for e in plan['exercises'] if e['id'] != exercise_id]
-                break
+        if app.registry.remove_exercise(self.current_plan_id, exercise_id):
+            app.record('delete_exercise', plan_id=self.current_plan_id, exercise_id=exercise_id)
         self.update_view()
 
     def move_exercise(self, exercise_id, direction):
         app = App.get_running_app()
-        for plan in app.data['plans']:
-            if plan['id'] == self.current_plan_id:
-                exercises = plan['exercises']
-                idx = next((i for i, ex in enumerate(exercises) if ex['id'] == exercise_id), -1)
-                
-                if idx != -1:
-                    new_idx = idx + direction
-                    if 0 <= new_idx < len(exercises):
-                        exercises.insert(new_idx, exercises.pop(idx))
-                        self.update_view()
-                break
+        if app.registry.move_exercise(self.current_plan_id, exercise_id, direction):
+            exercises = app.registry.plan(self.current_plan_id)['exercises']
+            app.record('reorder_exercises', plan_id=self.current_plan_id, order=[ex['id'] for ex in exercises])
+            self.update_view()
 
 
 class ExerciseCreationScreen(Screen):
@@ -1214,7 +746,7 @@ class ExerciseCreationScreen(Screen):
     def save_exercise(self):
         app = App.get_running_app()
         plan_screen = self.manager.get_screen('workout_plan_screen')
-        plan = next((p for p in app.data['plans'] if p['id'] == plan_screen.current_plan_id), None)
+        plan = app.registry.plan(plan_screen.current_plan_id)
 
         if plan and self.ids.exercise_name_input.text and self.ids.primary_spinner.text != 'Primary Muscle':
             new_exercise = {
@@ -1224,7 +756,8 @@ class ExerciseCreationScreen(Screen):
                 "secondary_muscle": self.ids.secondary_spinner.text if self.ids.secondary_spinner.text != 'Secondary Muscle (Optional)' else 'None',
                 "rest_time": int(self.ids.rest_time_input.text or 60)
             }
-            plan['exercises'].append(new_exercise)
+            app.registry.add_exercise(plan['id'], new_exercise)
+            app.record('add_exercise', plan_id=plan['id'], exercise=new_exercise)
             plan_screen.load_plan(plan_id=plan['id'])
             self.manager.current = 'workout_plan_screen'
 
@@ -1232,19 +765,19 @@ class ExerciseDetailScreen(Screen):
     current_plan_id = StringProperty(None)
     current_exercise_id = StringProperty(None)
     is_editing = BooleanProperty(False)
+    show_full_history = BooleanProperty(False)
 
     def load_exercise(self, plan_id, exercise_id):
         self.current_plan_id = plan_id
         self.current_exercise_id = exercise_id
         self.is_editing = False
         self.update_view()
+        self.update_stats()
         self.plot_progress()
 
     def update_view(self):
         app = App.get_running_app()
-        plan = next((p for p in app.data['plans'] if p['id'] == self.current_plan_id), None)
-        if not plan: return
-        exercise = next((e for e in plan['exercises'] if e['id'] == self.current_exercise_id), None)
+        exercise = app.registry.exercise(self.current_plan_id, self.current_exercise_id)
         if not exercise: return
         
         self.ids.exercise_title_input.text = exercise['name']
@@ -1256,29 +789,37 @@ class ExerciseDetailScreen(Screen):
         self.ids.secondary_spinner.text = exercise.get('secondary_muscle', 'Secondary Muscle')
         self.ids.rest_time_input.text = str(exercise.get('rest_time', 60))
 
+    def update_stats(self):
+        # One entry of the summary of every exercise, which the app keeps until the history changes
+        summary = App.get_running_app().get_exercise_summary().get(self.current_exercise_id)
+        if summary is None:
+            self.ids.progress_stats_label.text = 'No history yet'
+            return
+        delta = summary['week_delta']
+        delta_color = get_hex_from_color(GREEN_COLOR if delta > 0 else RED_COLOR if delta < 0 else MUTED_TEXT_COLOR)
+        self.ids.progress_stats_label.text = (
+            f"e1RM {summary['e1rm_epley']:g} kg  ·  last {ROLLING_WINDOW} avg {summary['rolling_volume']:g} kg\n"
+            f"Week of {summary['week_start']}: {summary['week_volume']:g} kg [color={delta_color}]({delta:+g})[/color]"
+        )
+
+    def toggle_history_range(self):
+        self.show_full_history = not self.show_full_history
+        self.plot_progress()
+
     def plot_progress(self):
         app = App.get_running_app()
-        sessions = app.data.get('workout_sessions', [])
-        
-        weight_data, reps_data, volume_data = [], [], []
-        exercise_sessions = []
-        for sess in sorted(sessions, key=lambda x: x['date']):
-            for ex in sess['exercises']:
-                ex_id_key = 'id' if 'id' in ex else 'exercise_id'
-                if ex[ex_id_key] == self.current_exercise_id and ex.get('sets'):
-                    exercise_sessions.append(ex)
-
-        for ex in exercise_sessions:
-            avg_weight = sum(s['weight'] for s in ex['sets']) / len(ex['sets'])
-            avg_reps = sum(s['reps'] for s in ex['sets']) / len(ex['sets'])
-            total_volume = sum(s['weight'] * s['reps'] for s in ex['sets'])
-            weight_data.append(avg_weight)
-            reps_data.append(avg_reps)
-            volume_data.append(total_volume)
+
+        if self.show_full_history:
+            series = app.get_exercise_series(self.current_exercise_id)
+            self.ids.weight_reps_graph.set_series(series.weight, series.reps)
+            self.ids.volume_graph.set_series(series.volume)
+            return
         
-        last_5_weights = weight_data[-5:]
-        last_5_reps = reps_data[-5:]
-        last_5_vols = volume_data[-5:]
+        # Only the tail shown on the graph is read, using the aggregates stored with each log
+        stats = app.get_exercise_stats(self.current_exercise_id, limit=5)
+        last_5_weights = [st['avg_weight'] for st in stats]
+        last_5_reps = [st['avg_reps'] for st in stats]
+        last_5_vols = [st['volume'] for st in stats]
         
         x_max = 4 # Represents 5 data points (indices 0-4)
 
@@ -1305,16 +846,13 @@ class ExerciseDetailScreen(Screen):
 
     def save_changes(self):
         app = App.get_running_app()
-        for plan in app.data['plans']:
-            if plan['id'] == self.current_plan_id:
-                for ex in plan['exercises']:
-                    if ex['id'] == self.current_exercise_id:
-                        ex['name'] = self.ids.exercise_title_input.text
-                        ex['primary_muscle'] = self.ids.primary_spinner.text
-                        ex['secondary_muscle'] = self.ids.secondary_spinner.text
-                        ex['rest_time'] = int(self.ids.rest_time_input.text or 60)
-                        break
-                break
+        ex = app.registry.exercise(self.current_plan_id, self.current_exercise_id)
+        if ex:
+            ex['name'] = self.ids.exercise_title_input.text
+            ex['primary_muscle'] = self.ids.primary_spinner.text
+            ex['secondary_muscle'] = self.ids.secondary_spinner.text
+            ex['rest_time'] = int(self.ids.rest_time_input.text or 60)
+            app.record('update_exercise', plan_id=self.current_plan_id, exercise=ex)
         self.is_editing = False
         self.update_view()
 
@@ -1326,10 +864,14 @@ class ActiveWorkoutScreen(Screen):
     exercise_data = DictProperty({})
     session_data = DictProperty({})
     target_volume = NumericProperty(0)
+    current_volume = NumericProperty(0)
+    set_volumes = ListProperty([])
+    previous_sets = ListProperty([])
+    exercise_records = ObjectProperty(None, allownone=True)
     
     rest_time_remaining = NumericProperty(0)
     is_resting = BooleanProperty(False)
-    timer_event = ObjectProperty(None, allownone=True)
+    rest_timer = ObjectProperty(None, allownone=True)
     rest_timer_text = StringProperty('Start Rest')
 
     def on_leave(self, *args):
@@ -1337,18 +879,17 @@ class ActiveWorkoutScreen(Screen):
         pass
 
     def load_exercise(self, exercise_data, session_data):
+        trace.event('load_exercise', exercise_id=exercise_data['id'])
         self.exercise_data = exercise_data
         self.session_data = session_data
         self.ids.active_exercise_title.text = self.exercise_data['name']
-        self.ids.set_list.clear_widgets()
         
         # If there's an active timer for another exercise, stop it
         if self.is_resting:
             self.stop_rest_timer()
         
         app = App.get_running_app()
-        history = app.get_exercise_history(self.exercise_data['id'])
-        last_5_volumes = history[-5:]
+        last_5_volumes = app.get_exercise_history(self.exercise_data['id'], limit=5)
         if last_5_volumes:
             avg_volume = sum(last_5_volumes) / len(last_5_volumes)
             self.target_volume = avg_volume * 1.1
@@ -1358,102 +899,119 @@ class ActiveWorkoutScreen(Screen):
         self.ids.volume_progress_bar.max = self.target_volume
         
         ex_id = self.exercise_data['id']
+        # First use of the records, if they were not prewarmed; refresh_records() flags the sets once they arrive
+        app.request_records()
+        self.exercise_records = app.records.get(ex_id) if app.records is not None else None
+        # Each set row is compared live with the set at the same position last session
+        last_session_sets = app.get_last_sets_for_exercise(ex_id)
+        self.previous_sets = last_session_sets
         if ex_id in self.session_data.get('exercises', {}):
             ex_log = self.session_data['exercises'][ex_id]
             self.ids.exercise_notes_input.text = ex_log.get('notes', '')
-            for i, s in enumerate(ex_log['sets']):
-                set_entry = SetEntry(set_number=i + 1)
-                set_entry.ids.weight_input.text = str(s['weight'])
-                set_entry.ids.reps_input.text = str(s['reps'])
-                set_entry.ids.weight_input.bind(text=self.update_volume_progress)
-                set_entry.ids.reps_input.bind(text=self.update_volume_progress)
-                self.ids.set_list.add_widget(set_entry)
-            self.update_set_numbers()
+            self.set_rows([{'weight': str(s['weight']), 'reps': str(s['reps'])} for s in ex_log['sets']])
         else:
             self.ids.exercise_notes_input.text = ''
             # Pre-populate with previous workout's sets if available
-            last_session_sets = app.get_last_sets_for_exercise(ex_id)
             if last_session_sets:
-                 for i, s in enumerate(last_session_sets):
-                    set_entry = SetEntry(set_number=i + 1)
-                    set_entry.ids.weight_input.text = str(s['weight'])
-                    set_entry.ids.reps_input.text = str(s['reps'])
-                    set_entry.ids.weight_input.bind(text=self.update_volume_progress)
-                    set_entry.ids.reps_input.bind(text=self.update_volume_progress)
-                    self.ids.set_list.add_widget(set_entry)
+                self.set_rows([{'weight': str(s['weight']), 'reps': str(s['reps'])} for s in last_session_sets])
             else:
-                for _ in range(3): self.add_set() # Default to 3 empty sets
-        
+                self.set_rows([{'weight': '', 'reps': ''} for _ in range(3)]) # Default to 3 empty sets
+        self.ids.set_list.scroll_y = 1
+
+    def set_rows(self, rows):
+        # The set list's RecycleView data is the model for the sets being entered. Alongside it,
+        # set_volumes caches each row's parsed volume so edits only apply their difference.
+        rows = [dict(row, set_number=i + 1, can_be_removed=len(rows) > 1) for i, row in enumerate(rows)]
+        self.set_volumes = []
+        for i, row in enumerate(rows):
+            parsed = parse_set(row)
+            self.set_volumes.append(parsed[0] * parsed[1] if parsed else 0)
+            row['comparison'], row['comparison_color'] = compare_set(parsed, self.previous_set(i))
+            row['is_record'] = self.is_record(parsed)
+        reconcile_rows(self.ids.set_list, rows, 'set_number')
         self.update_volume_progress()
 
+    def refresh_records(self):
+        # The record book arrived while this exercise was loaded
+        if not self.exercise_data: return
+        self.exercise_records = App.get_running_app().records.get(self.exercise_data['id'])
+        self.set_rows(list(self.ids.set_list.data))
+
+    def previous_set(self, index):
+        return self.previous_sets[index] if index < len(self.previous_sets) else None
+
+    def is_record(self, parsed):
+        # Against the bests from before this workout, an O(1) lookup per set. An exercise
+        # without history has no records to beat.
+        return self.exercise_records is not None and bool(parsed) and bool(self.exercise_records.set_kinds(*parsed))
+
     def add_set(self):
-        new_set = SetEntry()
-        new_set.ids.weight_input.bind(text=self.update_volume_progress)
-        new_set.ids.reps_input.bind(text=self.update_volume_progress)
-        self.ids.set_list.add_widget(new_set)
-        self.update_set_numbers()
-        Clock.schedule_once(lambda dt: self.ids.set_scroll.scroll_to(new_set))
+        trace.event('add_set')
+        self.set_rows(self.ids.set_list.data + [{'weight': '', 'reps': ''}])
+        Clock.schedule_once(lambda dt: self.scroll_to_last_set())
     
-    def remove_set(self, set_widget):
-        if len(self.ids.set_list.children) > 1:
-            self.ids.set_list.remove_widget(set_widget)
-            self.update_set_numbers()
-            self.update_volume_progress()
-
-    def update_set_numbers(self):
-        for i, widget in enumerate(reversed(self.ids.set_list.children)):
-            widget.set_number = i + 1
-            widget.can_be_removed = len(self.ids.set_list.children) > 1
+    def scroll_to_last_set(self):
+        rv = self.ids.set_list
+        if rv.children and rv.children[0].height > rv.height:
+            rv.scroll_y = 0
+
+    def remove_set(self, index):
+        rows = self.ids.set_list.data
+        if len(rows) > 1 and index is not None:
+            trace.event('remove_set', index=index)
+            self.set_rows(rows[:index] + rows[index + 1:])
+
+    def update_set(self, index, field, text):
+        # Edited in place: reassigning the data would refresh every visible row on each keystroke
+        # Only the edited row is parsed, and the running total moves by its change in volume
+        rows = self.ids.set_list.data
+        if index >= len(rows) or rows[index][field] == text:
+            return None
+        trace.event('update_set', index=index, field=field, text=text)
+        row = rows[index]
+        row[field] = text
+        parsed = parse_set(row)
+        volume = parsed[0] * parsed[1] if parsed else 0
+        self.current_volume += volume - self.set_volumes[index]
+        self.set_volumes[index] = volume
+        row['comparison'], row['comparison_color'] = compare_set(parsed, self.previous_set(index))
+        row['is_record'] = self.is_record(parsed)
+        return row
 
     def update_volume_progress(self, *args):
-        current_volume = 0
-        for set_widget in reversed(self.ids.set_list.children):
-            try:
-                weight = float(set_widget.ids.weight_input.text or 0)
-                reps = int(set_widget.ids.reps_input.text or 0)
-                current_volume += weight * reps
-            except (ValueError, AttributeError):
-                continue
-        self.ids.volume_progress_bar.value = current_volume
+        self.current_volume = sum(self.set_volumes)
 
-    def start_rest_timer(self, restart=True):
-        if self.is_resting: return # Don't start a new timer if one is running
-        if restart:
-            total_time = self.exercise_data.get('rest_time', 60)
-            self.rest_time_remaining = total_time
-        
+    def start_rest_timer(self):
+        # Starting again while resting restarts the countdown from the full rest time
+        if self.rest_timer: self.rest_timer.cancel()
         self.is_resting = True
-        self.rest_timer_text = f"{int(self.rest_time_remaining)}s"
-        
-        if self.timer_event: self.timer_event.cancel()
-        self.timer_event = Clock.schedule_interval(self.update_rest_timer, 1)
+        self.rest_timer = App.get_running_app().timers.countdown(
+            self.exercise_data.get('rest_time', 60), self.update_rest_timer, self.stop_rest_timer
+        )
 
-    def update_rest_timer(self, dt):
-        self.rest_time_remaining -= 1
-        self.rest_timer_text = f"{int(self.rest_time_remaining)}s"
-        if self.rest_time_remaining <= 0:
-            self.stop_rest_timer()
+    def update_rest_timer(self, remaining):
+        self.rest_time_remaining = remaining
+        self.rest_timer_text = f"{remaining}s"
             
     def stop_rest_timer(self):
-        if self.timer_event:
-            self.timer_event.cancel()
-            self.timer_event = None
+        if self.rest_timer:
+            self.rest_timer.cancel()
+            self.rest_timer = None
         self.is_resting = False
         self.rest_time_remaining = 0
         self.rest_timer_text = 'Start Rest'
 
     def pause_rest_timer(self):
-        if self.timer_event:
-            self.timer_event.cancel()
+        if self.rest_timer:
+            self.rest_timer.pause()
 
     def resume_rest_timer(self):
-        if not self.is_resting: return
-        self.start_rest_timer(restart=False)
+        if self.rest_timer:
+            self.rest_timer.resume()
 
     def add_to_rest_timer(self, seconds):
-        if not self.is_resting: return
-        self.rest_time_remaining += seconds
-        self.rest_timer_text = f"{int(self.rest_time_remaining)}s"
+        if self.rest_timer:
+            self.rest_timer.add(seconds)
 
     def open_rest_timer_options(self):
         self.pause_rest_timer()
@@ -1472,15 +1030,13 @@ class ActiveWorkoutScreen(Screen):
         popup.open()
 
     def finish_exercise(self):
+        trace.event('finish_exercise')
         self.stop_rest_timer()
         sets = []
-        for set_widget in reversed(self.ids.set_list.children):
-            try:
-                weight = float(set_widget.ids.weight_input.text or 0)
-                reps = int(set_widget.ids.reps_input.text or 0)
-                if weight > 0 and reps > 0:
-                    sets.append({'weight': weight, 'reps': reps})
-            except (ValueError, AttributeError): continue
+        for row in self.ids.set_list.data:
+            parsed = parse_set(row)
+            if parsed and parsed[0] > 0 and parsed[1] > 0:
+                sets.append({'weight': parsed[0], 'reps': parsed[1]})
         
         ex_id = self.exercise_data['id']
         self.session_data['exercises'][ex_id] = {
@@ -1489,6 +1045,10 @@ class ActiveWorkoutScreen(Screen):
             'sets': sets,
             'notes': self.ids.exercise_notes_input.text
         }
+        # Which records the sets beat, for the summary; the bests themselves change when the workout is saved
+        records = App.get_running_app().records
+        if records is not None:
+            self.session_data['records'][ex_id] = records.log_records(ex_id, sets)
 
         plan_screen = self.manager.get_screen('workout_plan_screen')
         plan_screen.update_exercise_status(ex_id, is_complete=bool(sets))
@@ -1499,36 +1059,36 @@ class WorkoutSummaryScreen(Screen):
     plan_screen = ObjectProperty(None)
 
     def load_summary(self, session_data, plan_screen):
+        trace.event('load_summary')
         self.session_data = session_data
         self.plan_screen = plan_screen
-        layout = self.ids.summary_layout
-        layout.clear_widgets()
 
         logged_exercises = [ex for ex in session_data.get('exercises', {}).values() if ex.get('sets')]
 
+        # One flat row per exercise name and per set. Every row sets the same keys, since
+        # recycled labels keep whatever a previous row gave them.
+        rows = []
         if not logged_exercises:
-            layout.add_widget(Label(text="No sets were logged in this workout.", italic=True))
-            return
+            rows.append({'text': "No sets were logged in this workout.", 'italic': True, 'height': dp(60)})
 
+        records = session_data.get('records', {})
+        record_book = App.get_running_app().records or RecordBook()
+        pr_color = get_hex_from_color(RECORD_COLOR)
         for exercise in logged_exercises:
-            ex_box = BoxLayout(orientation='vertical', size_hint_y=None, spacing='5dp')
-            ex_box.bind(minimum_height=ex_box.setter('height'))
-            
-            ex_box.add_widget(Label(
-                text=f"[b]{exercise['name']}[/b]",
-                size_hint_y=None,
-                height=dp(30)
-            ))
-            
-            for s in exercise['sets']:
-                set_label = Label(
-                    text=f"  - {s['weight']} kg x {s['reps']} reps",
-                    size_hint_y=None,
-                    height=dp(25)
-                )
-                ex_box.add_widget(set_label)
-            
-            layout.add_widget(ex_box)
+            ex_id = exercise['exercise_id']
+            found = records.get(ex_id) or record_book.log_records(ex_id, exercise['sets'])
+            title = f"[b]{exercise['name']}[/b]"
+            if found['log']:
+                title += f"  [color={pr_color}]PR: {describe(found['log'])}[/color]"
+            rows.append({'text': title, 'italic': False, 'height': dp(30)})
+            for s, kinds in zip(exercise['sets'], found['sets']):
+                text = f"  - {s['weight']} kg x {s['reps']} reps"
+                if kinds:
+                    text += f"  [color={pr_color}]PR: {describe(kinds)}[/color]"
+                rows.append({'text': text, 'italic': False, 'height': dp(25)})
+
+        self.ids.summary_layout.data = rows
+        self.ids.summary_layout.scroll_y = 1
     
     def confirm_finish(self):
         self.plan_screen.stop_workout(self.session_data, save=True)
@@ -1538,92 +1098,301 @@ class WorkoutSummaryScreen(Screen):
         self.manager.current = 'workout_plan_screen'
 
 
+# Screens are registered as classes with their kv/ file, and only constructed, with that file
+# loaded, the first time they are shown or looked up with get_screen().
+class LazyScreenManager(ScreenManager):
+    def __init__(self, kv_loader, **kwargs):
+        super().__init__(**kwargs)
+        self.kv_loader = kv_loader
+        self.pending = {}
+
+    def register(self, name, screen_cls, kv_file):
+        self.pending[name] = (screen_cls, kv_file)
+
+    def _construct(self, name):
+        entry = self.pending.pop(name, None)
+        if entry is not None:
+            screen_cls, kv_file = entry
+            self.kv_loader.load(kv_file)
+            self.add_widget(screen_cls(name=name))
+
+    def get_screen(self, name):
+        self._construct(name)
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self.pending or super().has_screen(name)
+
+    def prewarm(self, *args):
+        # One screen per frame, so no single frame absorbs the cost of all of them
+        if self.pending:
+            self._construct(next(iter(self.pending)))
+            Clock.schedule_once(self.prewarm)
+
+
 class GymApp(App):
     data = DictProperty(None)
+    store = None
+    history_db = None
+    autosaver = None
+    history_index = None
+    registry = None
+    series_cache = None
+    set_table = None
+    exercise_summary = None
+    records = None
+    _records_waiting = None
+    timers = None
 
     def build(self):
+        startup.checkpoint('app_init')
         self.load_data()
+        startup.checkpoint('load_data')
+        # One Clock event drives the workout stopwatch and rest countdowns, waking only when a shown value changes
+        self.timers = TimerService()
         Window.clearcolor = BG_COLOR
         
-        sm = ScreenManager()
-        sm.add_widget(PlanSelectScreen(name='plan_select_screen'))
-        sm.add_widget(WorkoutPlanScreen(name='workout_plan_screen'))
-        sm.add_widget(ExerciseCreationScreen(name='exercise_creation_screen'))
-        sm.add_widget(ExerciseDetailScreen(name='exercise_detail_screen'))
-        sm.add_widget(ActiveWorkoutScreen(name='active_workout_screen'))
-        sm.add_widget(WorkoutSummaryScreen(name='workout_summary_screen'))
+        # KV rules come from the kv/ files, parsed once and then read back from a compiled cache
+        kv_loader = KVLoader(os.path.join(self.user_data_dir, 'kv_cache'))
+        kv_loader.load('base.kv')
+        kv_loader.load('plan_select.kv')
+        startup.checkpoint('kv')
+
+        sm = LazyScreenManager(kv_loader)
+        plan_select = PlanSelectScreen(name='plan_select_screen')
+        startup.checkpoint('screens')
+        # Adding the first screen makes it current, which runs its on_enter and populate_plans
+        sm.add_widget(plan_select)
+        startup.checkpoint('plan_list')
+        sm.register('workout_plan_screen', WorkoutPlanScreen, 'workout_plan.kv')
+        sm.register('exercise_creation_screen', ExerciseCreationScreen, 'exercise_creation.kv')
+        sm.register('exercise_detail_screen', ExerciseDetailScreen, 'exercise_detail.kv')
+        sm.register('active_workout_screen', ActiveWorkoutScreen, 'active_workout.kv')
+        sm.register('workout_summary_screen', WorkoutSummaryScreen, 'workout_summary.kv')
         return sm
 
+    def on_start(self):
+        if startup.enabled:
+            Window.bind(on_flip=self.on_first_frame)
+        if PREWARM_SCREENS:
+            Clock.schedule_once(lambda dt: self.request_records(), PREWARM_DELAY / 2)
+            Clock.schedule_once(self.root.prewarm, PREWARM_DELAY)
+
+    def request_records(self):
+        # Personal bests of every exercise, built on the autosave worker from one pass over the
+        # history. Until they arrive self.records is None and sets are simply not checked for
+        # records; sessions saved and plans deleted in the meantime are applied on arrival.
+        if self.records is not None or self._records_waiting is not None:
+            return
+        self._records_waiting = []
+        if self.history_db is not None:
+            self.history_db.read_set_table(self._build_records)
+        else:
+            self.autosaver.submit(self._build_records, SessionCapture(self.data['workout_sessions']))
+
+    def _build_records(self, history):
+        # On the worker: a SetTable from the history backend, or the captured JSON sessions
+        records = RecordBook()
+        if isinstance(history, SetTable):
+            records.add_set_table(history)
+        else:
+            for session in history.sessions():
+                records.add_session(session)
+        self._records_built(records)
+
+    @mainthread
+    def _records_built(self, records):
+        for update, arg in self._records_waiting:
+            update(records, arg)
+        self.records = records
+        self._records_waiting = None
+        if self.root is not None and 'active_workout_screen' in self.root.screen_names:
+            self.root.get_screen('active_workout_screen').refresh_records()
+
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        startup.checkpoint('first_frame')
+        startup.write(self.user_data_dir, storage=STORAGE_MODE, history=HISTORY_BACKEND)
+
     def get_data_file(self):
         return os.path.join(self.user_data_dir, 'data.json')
 
+    def get_default_data(self):
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "plans": [], 
+            "muscle_groups": ["None", "Chest", "Back", "Shoulders", "Biceps", "Triceps", "Quads", "Hamstrings", "Glutes", "Calves", "Abs"],
+            "workout_sessions": []
+        }
+
     def load_data(self):
-        try:
-            with open(self.get_data_file(), 'r') as f:
-                self.data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.data = {
-                "plans": [], 
-                "muscle_groups": ["None", "Chest", "Back", "Shoulders", "Biceps", "Triceps", "Quads", "Hamstrings", "Glutes", "Calves", "Abs"],
-                "workout_sessions": []
-            }
+        if STORAGE_MODE == 'journal':
+            self.store = JournalStore(self.get_data_file())
+            self.data = self.store.load(self.get_default_data)
+        else:
+            try:
+                self.data = load_snapshot(self.get_data_file())
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.data = self.get_default_data()
         
-        # Data migration/validation
-        if 'workout_sessions' not in self.data:
-            self.data['workout_sessions'] = []
-        for plan in self.data.get('plans', []):
-            for ex in plan.get('exercises', []):
-                if 'rest_time' not in ex:
-                    ex['rest_time'] = 60
+        # Legacy layouts are upgraded once here, everything past this point sees the current schema
+        migrated = migrate(self.data)
+        if not isinstance(self.data.get('workout_sessions'), SessionList):
+            self.data['workout_sessions'] = SessionList(self.data.get('workout_sessions', []))
+
+        if HISTORY_BACKEND == 'sqlite':
+            # Imported here: sqlite3 is not in the buildozer requirements, only needed with this backend
+            from history_db import SqliteHistory
+            self.history_db = SqliteHistory(os.path.join(self.user_data_dir, 'history.db'), submit=self.submit_write)
+        elif HISTORY_BACKEND == 'columnar':
+            self.history_db = ColumnarHistory(os.path.join(self.user_data_dir, 'history.bin'), submit=self.submit_write)
+
+        # Created before the import, which the history backend writes out through it
+        self.autosaver = Autosaver(lambda: self.data, store=self.store, snapshot_path=self.get_data_file())
+        if self.history_db is not None and self.data['workout_sessions']:
+            # One-time move of the JSON history into the history backend
+            self.history_db.import_sessions(self.data['workout_sessions'])
+            self.data['workout_sessions'] = SessionList()
+            # Queued at once, behind the backend's import, or every launch until the next save
+            # would parse and import it again
+            self.autosaver.compact_soon()
+            self.autosaver.flush()
+        elif migrated or (self.store is not None and self.store.needs_upgrade):
+            self.autosaver.compact_soon()
+
+        # Built over the loaded (and journal-replayed) plans; handlers mutate plans through it from here on
+        self.registry = PlanRegistry(self.data['plans'])
+        self.series_cache = {}
+
+    def submit_write(self, func, *args):
+        # The history backend's writes, run on the autosave worker rather than the main loop
+        self.autosaver.submit(func, *args)
+
+    def on_pause(self):
+        # Android may kill a paused app without calling on_stop, so the writes are waited for, briefly
+        self.autosaver.flush()
+        self.autosaver.wait(AUTOSAVE_PAUSE_TIMEOUT)
+        return True
     
     def on_stop(self):
         self.save_data()
+        if self.history_db is not None:
+            self.history_db.close()
 
     def save_data(self):
-        with open(self.get_data_file(), 'w') as f:
-            json.dump(self.data, f, indent=2)
+        # Writes out anything still pending and waits for the autosave worker to finish
+        self.autosaver.close()
+
+    def record(self, op, **fields):
+        fields['op'] = op
+        self.autosaver.mark_dirty(RECORD_SECTIONS[op], fields)
 
     def get_plan_name(self, plan_id):
-        plan = next((p for p in self.data['plans'] if p['id'] == plan_id), None)
+        plan = self.registry.plan(plan_id)
         return plan['name'] if plan else ''
     
-    def get_exercise_history(self, exercise_id):
-        sessions = self.data.get('workout_sessions', [])
-        dated_volumes = []
-        for sess in sessions:
-            for ex in sess.get('exercises', []):
-                ex_id_key = 'id' if 'id' in ex else 'exercise_id'
-                if ex.get(ex_id_key) == exercise_id and ex.get('sets'):
-                    total_volume = sum(s.get('weight', 0) * s.get('reps', 0) for s in ex['sets'])
-                    dated_volumes.append((sess['date'], total_volume))
-        
-        dated_volumes.sort(key=lambda x: x[0])
-        return [volume for date, volume in dated_volumes]
+    def add_session(self, session):
+        for log in session['exercises']:
+            self.series_cache.pop(log['exercise_id'], None)
+        if self.set_table is not None:
+            self.set_table.add_sessions([session])
+        self.exercise_summary = None
+        if self.records is not None:
+            self.records.add_session(session)
+        elif self._records_waiting is not None:
+            self._records_waiting.append((RecordBook.add_session, session))
+        if self.history_db is not None:
+            self.history_db.add_session(session)
+            return
+        self.data['workout_sessions'].append(session)
+        self.record('add_session', session=session)
+        if self.history_index is not None:
+            self.history_index.add_session(session)
+
+    def get_history_index(self):
+        # Built on first use rather than in load_data, so the lazily loaded history is only parsed when needed
+        if self.history_index is None:
+            self.history_index = ExerciseHistoryIndex(self.data.get('workout_sessions', []))
+        return self.history_index
+
+    def get_last_workout_date(self):
+        if self.history_db is not None:
+            return self.history_db.get_last_workout_date()
+        # O(1) on the date-ordered list, and read from the snapshot header while the history is still unparsed
+        return self.data['workout_sessions'].last_date()
+
+    def query(self):
+        # Every exercise log of the history, narrowed with the Query methods. The history
+        # backend in use runs the filters, on its own indexes where it has them.
+        source = self.history_db if self.history_db is not None else self.get_history_index()
+        return Query(source, self.registry)
+
+    def get_exercise_stats(self, exercise_id, limit=None):
+        return self.query().exercise(exercise_id).last(limit).stats()
+
+    def get_exercise_timeline(self, exercise_id, limit=None):
+        return self.query().exercise(exercise_id).last(limit).timeline()
+
+    def get_exercise_series(self, exercise_id):
+        # Decimated whole-history series for the time-axis charts, built once per exercise
+        # and dropped whenever that exercise's history changes
+        series = self.series_cache.get(exercise_id)
+        if series is None:
+            series = self.series_cache[exercise_id] = ExerciseSeries(self.get_exercise_timeline(exercise_id))
+        return series
+
+    def get_set_table(self):
+        # Flat set columns for the analytics, loaded on first use and appended to as sessions are logged
+        if self.set_table is None:
+            if self.history_db is not None:
+                self.set_table = self.history_db.get_set_table()
+            else:
+                self.set_table = SetTable()
+                self.set_table.add_sessions(self.data['workout_sessions'])
+        return self.set_table
+
+    def get_exercise_summary(self):
+        # Progression metrics of every exercise in one vectorized pass, kept until the history changes
+        if self.exercise_summary is None:
+            self.exercise_summary = summarize(self.get_set_table())
+        return self.exercise_summary
+
+    def get_exercise_history(self, exercise_id, limit=None):
+        return self.query().exercise(exercise_id).last(limit).volumes()
 
     def get_last_sets_for_exercise(self, exercise_id):
-        sessions = sorted(self.data.get('workout_sessions', []), key=lambda x: x['date'], reverse=True)
-        for sess in sessions:
-            for ex in sess.get('exercises', []):
-                ex_id_key = 'id' if 'id' in ex else 'exercise_id'
-                if ex.get(ex_id_key) == exercise_id and ex.get('sets'):
-                    return ex['sets']
-        return []
+        row = self.query().exercise(exercise_id).with_sets().newest_first().first()
+        return row.sets if row else []
 
     def delete_item(self, item_type, item_id, plan_id=None):
         if item_type == 'plan':
-            self.data['plans'] = [p for p in self.data['plans'] if p['id'] != item_id]
-            self.data['workout_sessions'] = [s for s in self.data['workout_sessions'] if s.get('plan_id') != item_id]
-            if self.root.current == 'plan_select_screen':
+            plan = self.registry.plan(item_id)
+            if plan:
+                # Exercise ids belong to one plan, so this drops exactly the records of its history
+                exercise_ids = [ex['id'] for ex in plan['exercises']]
+                if self.records is not None:
+                    self.records.remove_exercises(exercise_ids)
+                elif self._records_waiting is not None:
+                    self._records_waiting.append((RecordBook.remove_exercises, exercise_ids))
+            self.registry.remove_plan(item_id)
+            self.data['workout_sessions'].remove_plan(item_id)
+            self.record('delete_plan', plan_id=item_id)
+            if self.history_db is not None:
+                self.history_db.delete_plan_sessions(item_id)
+            if self.history_index is not None:
+                self.history_index.remove_plan(item_id)
+            self.series_cache.clear()
+            self.set_table = None
+            self.exercise_summary = None
+            # No root when driven headlessly, e.g. by the benchmarks
+            if self.root is not None and self.root.current == 'plan_select_screen':
                 self.root.get_screen('plan_select_screen').populate_plans()
         
         elif item_type == 'exercise' and plan_id:
-            for plan in self.data['plans']:
-                if plan['id'] == plan_id:
-                    plan['exercises'] = [e for e in plan['exercises'] if e['id'] != item_id]
-                    break
-            if self.root.current == 'workout_plan_screen':
+            if self.registry.remove_exercise(plan_id, item_id):
+                self.record('delete_exercise', plan_id=plan_id, exercise_id=item_id)
+            if self.root is not None and self.root.current == 'workout_plan_screen':
                 self.root.get_screen('workout_plan_screen').update_view()
 
 if __name__ == '__main__':
-    Builder.load_string(KV)
     GymApp().run()
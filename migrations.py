@@ -0,0 +1,62 @@
+# migrations.py
+from history import log_stats
+
+# Layout of app.data written by this version, stored in the data itself as 'schema_version'.
+# Files from before the field existed count as version 0.
+SCHEMA_VERSION = 3
+
+
+# --- Steps ---
+# Each step upgrades the data to the version it is registered under, and is safe to run on
+# data that is already partly upgraded.
+
+def _add_rest_time(data):
+    for plan in data.get('plans', []):
+        for ex in plan.get('exercises', []):
+            ex.setdefault('rest_time', 60)
+
+def _rename_log_exercise_key(log):
+    # Legacy logs key the exercise as 'id', current ones as 'exercise_id'
+    if 'exercise_id' not in log and 'id' in log:
+        log['exercise_id'] = log.pop('id')
+
+def _attach_log_stats(log):
+    if 'stats' not in log:
+        log['stats'] = log_stats(log.get('sets', []))
+
+MIGRATIONS = (
+    (1, _add_rest_time),
+)
+
+# Steps applied to every exercise log of every session
+LOG_MIGRATIONS = (
+    (2, _rename_log_exercise_key),
+    (3, _attach_log_stats),
+)
+
+
+# --- Pipeline ---
+
+def migrate_session(session, version=0):
+    for log in session.get('exercises', []):
+        for target, step in LOG_MIGRATIONS:
+            if version < target:
+                step(log)
+    return session
+
+def migrate(data):
+    # Upgrades app.data in place to SCHEMA_VERSION. Returns True when anything ran, in which case
+    # the caller should write the data back so the next start skips the pipeline.
+    version = data.get('schema_version', 0)
+    if version >= SCHEMA_VERSION:
+        return False
+
+    for target, step in MIGRATIONS:
+        if version < target:
+            step(data)
+    if any(version < target for target, step in LOG_MIGRATIONS):
+        for session in data.get('workout_sessions', []):
+            migrate_session(session, version)
+
+    data['schema_version'] = SCHEMA_VERSION
+    return True
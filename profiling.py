@@ -0,0 +1,45 @@
+# profiling.py
+import json
+import os
+import time
+from datetime import datetime
+
+# Set GYMAPP_PROFILE_STARTUP=1 to time every launch. Each launch appends one JSON report to
+# STARTUP_LOG in the app's data directory, so time-to-first-frame can be compared across builds.
+PROFILE_STARTUP = os.environ.get('GYMAPP_PROFILE_STARTUP') == '1'
+STARTUP_LOG = 'startup_profile.jsonl'
+
+
+# Launch timeline as a series of checkpoints on the monotonic clock. Each checkpoint closes the
+# phase that began at the previous one, so instrumenting a step is one line after it.
+class StartupProfiler:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.origin = time.monotonic()
+        self.checkpoints = [] # (name, seconds since origin)
+        self.reported = False
+
+    def checkpoint(self, name):
+        if self.enabled and not self.reported:
+            self.checkpoints.append((name, time.monotonic() - self.origin))
+
+    def report(self, **context):
+        phases, previous = [], 0.0
+        for name, at in self.checkpoints:
+            phases.append({'phase': name, 'ms': round((at - previous) * 1000, 2), 'at_ms': round(at * 1000, 2)})
+            previous = at
+        return dict(context, date=datetime.now().isoformat(timespec='seconds'), phases=phases,
+                    total_ms=round(previous * 1000, 2))
+
+    def write(self, directory, **context):
+        # Written once, at the first frame; later checkpoints are ignored
+        if not self.enabled or self.reported: return None
+        self.reported = True
+        path = os.path.join(directory, STARTUP_LOG)
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.report(**context)) + '\n')
+        return path
+
+
+# Started when main.py imports this module, before Kivy itself is imported
+startup = StartupProfiler(PROFILE_STARTUP)
@@ -0,0 +1,176 @@
+# query.py
+import itertools
+from collections import namedtuple
+from datetime import date, timedelta
+
+# Values a query can aggregate: the per-log stats columns, or 'logs' to count logs
+AGGREGATE_FIELDS = ('logs', 'volume', 'avg_weight', 'avg_reps', 'top_weight', 'top_reps', 'e1rm')
+AGGREGATES = ('sum', 'avg', 'min', 'max', 'count')
+GROUPINGS = (None, 'exercise', 'plan', 'date', 'week', 'month')
+
+
+# One exercise log of the history. sets and notes are only read for queries made with_sets(),
+# since some backends keep them apart from the per-log stats.
+class LogRow(namedtuple('LogRow', 'exercise_id date plan_id name stats sets notes')):
+    __slots__ = ()
+
+    def as_log(self):
+        # The log dict layout of data.json sessions, with the session's date added
+        return {
+            'exercise_id': self.exercise_id,
+            'name': self.name,
+            'date': self.date,
+            'sets': self.sets,
+            'notes': self.notes,
+            'stats': self.stats,
+        }
+
+
+def limited(rows, limit):
+    return rows if limit is None else itertools.islice(rows, limit)
+
+def week_start(date_str):
+    day = date.fromisoformat(date_str)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def group_key(row, by):
+    if by is None: return None
+    if by == 'exercise': return row.exercise_id
+    if by == 'plan': return row.plan_id
+    if by == 'date': return row.date
+    if by == 'week': return week_start(row.date)
+    return row.date[:7] # month
+
+def finish_aggregate(how, count, total, low, high):
+    if how == 'count': return count
+    if how == 'sum': return round(total, 2)
+    if how == 'avg': return round(total / count, 2) if count else 0
+    return low if how == 'min' else high
+
+def aggregate_rows(rows, field, how, by=None):
+    # The fallback for backends that cannot aggregate themselves: one pass, a few numbers per group
+    groups = {}
+    for row in rows:
+        value = 1 if field == 'logs' else row.stats[field]
+        key = group_key(row, by)
+        acc = groups.get(key)
+        if acc is None:
+            groups[key] = [1, value, value, value]
+        else:
+            acc[0] += 1
+            acc[1] += value
+            acc[2] = min(acc[2], value)
+            acc[3] = max(acc[3], value)
+    results = {key: finish_aggregate(how, *acc) for key, acc in sorted(groups.items(), key=lambda item: str(item[0]))}
+    if by is None:
+        return results.get(None, 0)
+    return results
+
+
+# A query over the exercise logs of the workout history. Each method narrows a copy of the
+# query, and nothing is read until it is iterated or one of the result methods is called.
+# The filters are handed to the backend's scan(), so they run where the data is indexed:
+# SQL for SQLite, bisect over the per-exercise lists for the JSON history, column ranges for
+# the columnar file. Aggregates are pushed down too when the backend has aggregate().
+#
+#   app.query().exercise(ex_id).last(5).volumes()
+#   app.query().muscle('Chest').between('2024-01-01', '2024-03-31').aggregate('volume', by='week')
+class Query:
+    def __init__(self, source, registry=None, **spec):
+        self.source = source
+        self.registry = registry
+        self.spec = dict({
+            'exercise_ids': None, 'plan_ids': None, 'start': None, 'end': None,
+            'newest_first': False, 'limit': None, 'with_sets': False,
+        }, **spec)
+        self.reverse_result = False # set by last(), which reads newest first and returns oldest first
+
+    def _narrow(self, **changes):
+        query = Query.__new__(Query)
+        query.__dict__.update(self.__dict__)
+        query.spec = dict(self.spec, **changes)
+        return query
+
+    def _restrict(self, key, ids):
+        current = self.spec[key]
+        ids = frozenset(ids)
+        return self._narrow(**{key: ids if current is None else current & ids})
+
+    # --- Filters ---
+
+    def exercise(self, *exercise_ids):
+        return self._restrict('exercise_ids', exercise_ids)
+
+    def plan(self, *plan_ids):
+        return self._restrict('plan_ids', plan_ids)
+
+    def muscle(self, *muscle_groups):
+        # Exercises currently in a plan that work any of these muscles, as primary or secondary
+        groups = set(muscle_groups)
+        return self._restrict('exercise_ids', [
+            ex['id'] for plan in self.registry.plans for ex in plan['exercises']
+            if ex.get('primary_muscle') in groups or ex.get('secondary_muscle') in groups
+        ])
+
+    def between(self, start=None, end=None):
+        # ISO dates, both inclusive; None leaves that side open
+        return self._narrow(start=start, end=end)
+
+    def newest_first(self):
+        return self._narrow(newest_first=True)
+
+    def limit(self, n):
+        return self._narrow(limit=n)
+
+    def last(self, n=None):
+        # The most recent n logs (all when None), oldest first
+        if n is None:
+            return self._narrow(newest_first=False, limit=None)
+        query = self._narrow(newest_first=True, limit=n)
+        query.reverse_result = True
+        return query
+
+    def with_sets(self):
+        return self._narrow(with_sets=True)
+
+    # --- Results ---
+
+    def _matches_nothing(self):
+        return any(self.spec[key] is not None and not self.spec[key] for key in ('exercise_ids', 'plan_ids'))
+
+    def __iter__(self):
+        if self._matches_nothing():
+            return iter(())
+        rows = self.source.scan(**self.spec)
+        if self.reverse_result:
+            return reversed(list(rows))
+        return iter(rows)
+
+    def rows(self):
+        return list(self)
+
+    def first(self):
+        return next(iter(self), None)
+
+    def volumes(self):
+        return [row.stats['volume'] for row in self]
+
+    def stats(self):
+        return [row.stats for row in self]
+
+    def timeline(self):
+        return [(row.date, row.stats) for row in self]
+
+    def logs(self):
+        return [row.as_log() for row in self]
+
+    def aggregate(self, field='volume', how='sum', by=None):
+        # {group: value} ordered by group, or a single value when by is None
+        if field not in AGGREGATE_FIELDS or how not in AGGREGATES or by not in GROUPINGS:
+            raise ValueError(f"Unsupported aggregate: {how}({field}) by {by}")
+        spec = self.spec
+        # A limited query aggregates only the rows it returns, which the backends do not push down
+        if hasattr(self.source, 'aggregate') and spec['limit'] is None and not self._matches_nothing():
+            return self.source.aggregate(field, how, by, exercise_ids=spec['exercise_ids'], plan_ids=spec['plan_ids'],
+                                         start=spec['start'], end=spec['end'])
+        return aggregate_rows(self._narrow(with_sets=False), field, how, by)
@@ -0,0 +1,102 @@
+# records.py
+from history import estimate_1rm
+
+RECORD_KINDS = ('weight', 'reps', 'set_volume', 'session_volume', 'e1rm')
+RECORD_LABELS = {
+    'weight': 'heaviest',
+    'reps': 'most reps',
+    'set_volume': 'set volume',
+    'session_volume': 'session volume',
+    'e1rm': 'e1RM',
+}
+
+
+def _normalized(weight, reps):
+    # The columnar history stores weights as float32; rounded back, 2.3 kg stays equal to 2.3
+    return round(weight, 3), reps
+
+
+# Personal bests of one exercise. Reps are kept per weight, and only count as a record at a
+# weight lifted before: a first set at a new weight is a record only if it is the heaviest.
+class ExerciseRecords:
+    __slots__ = ('top_weight', 'reps_at_weight', 'set_volume', 'session_volume', 'e1rm')
+
+    def __init__(self):
+        self.top_weight = 0
+        self.reps_at_weight = {}
+        self.set_volume = 0
+        self.session_volume = 0
+        self.e1rm = 0
+
+    def set_kinds(self, weight, reps):
+        # Records a set of weight x reps would beat, in RECORD_KINDS order
+        weight, reps = _normalized(weight, reps)
+        if weight <= 0 or reps <= 0: return []
+        kinds = []
+        if weight > self.top_weight:
+            kinds.append('weight')
+        best_reps = self.reps_at_weight.get(weight)
+        if best_reps is not None and reps > best_reps:
+            kinds.append('reps')
+        if round(weight * reps, 2) > self.set_volume:
+            kinds.append('set_volume')
+        if round(estimate_1rm(weight, reps), 2) > self.e1rm:
+            kinds.append('e1rm')
+        return kinds
+
+    def add_log(self, sets):
+        # sets as (weight, reps) pairs
+        volume = 0
+        for weight, reps in sets:
+            weight, reps = _normalized(weight, reps)
+            if weight <= 0 or reps <= 0: continue
+            if weight > self.top_weight:
+                self.top_weight = weight
+            if reps > self.reps_at_weight.get(weight, 0):
+                self.reps_at_weight[weight] = reps
+            self.set_volume = max(self.set_volume, round(weight * reps, 2))
+            self.e1rm = max(self.e1rm, round(estimate_1rm(weight, reps), 2))
+            volume += weight * reps
+        self.session_volume = max(self.session_volume, round(volume, 2))
+
+
+# Bests of every exercise, built from the history once and then kept current as sessions are
+# saved, each one in O(sets). Checking a set against them is O(1) and never reads the history.
+class RecordBook:
+    def __init__(self):
+        self.exercises = {} # exercise id -> ExerciseRecords
+
+    def get(self, exercise_id):
+        # None for an exercise without a logged set yet: there is nothing to beat
+        records = self.exercises.get(exercise_id)
+        return records if records is not None and records.top_weight else None
+
+    def remove_exercises(self, exercise_ids):
+        for exercise_id in exercise_ids:
+            self.exercises.pop(exercise_id, None)
+
+    def add_set_table(self, table):
+        # The whole history from the analytics columns (analytics.SetTable)
+        for log_idx, ex_idx in enumerate(table.log_exercise):
+            start, end = table.log_sets[log_idx], table.log_sets[log_idx + 1]
+            self.exercises.setdefault(table.exercise_ids[ex_idx], ExerciseRecords()).add_log(
+                zip(table.set_weight[start:end], table.set_reps[start:end]))
+
+    def add_session(self, session):
+        for log in session.get('exercises', []):
+            self.exercises.setdefault(log['exercise_id'], ExerciseRecords()).add_log(
+                (s.get('weight', 0), s.get('reps', 0)) for s in log.get('sets', []))
+
+    def log_records(self, exercise_id, sets):
+        # Records set by a log, compared with the history before it:
+        # {'sets': [[kinds] per set], 'log': ['session_volume'] or []}
+        records = self.get(exercise_id)
+        if records is None:
+            return {'sets': [[] for _ in sets], 'log': []}
+        per_set = [records.set_kinds(s['weight'], s['reps']) for s in sets]
+        volume = round(sum(s['weight'] * s['reps'] for s in sets if s['weight'] > 0 and s['reps'] > 0), 2)
+        return {'sets': per_set, 'log': ['session_volume'] if volume > records.session_volume else []}
+
+
+def describe(kinds):
+    return ', '.join(RECORD_LABELS[kind] for kind in kinds)
@@ -0,0 +1,63 @@
+# registry.py
+
+
+# Id lookups for plans and their exercises. The registry wraps the ordered 'plans' list from
+# app.data and performs every structural change on both, so the dicts never go stale.
+class PlanRegistry:
+    def __init__(self, plans):
+        self.plans = plans
+        self._plans = {p['id']: p for p in plans}
+        self._exercises = {p['id']: {e['id']: e for e in p['exercises']} for p in plans}
+
+    # --- Lookups ---
+
+    def plan(self, plan_id):
+        return self._plans.get(plan_id)
+
+    def exercise(self, plan_id, exercise_id):
+        return self._exercises.get(plan_id, {}).get(exercise_id)
+
+    # --- Plans ---
+
+    def add_plan(self, plan):
+        self.plans.append(plan)
+        self._plans[plan['id']] = plan
+        self._exercises[plan['id']] = {e['id']: e for e in plan['exercises']}
+
+    def remove_plan(self, plan_id):
+        plan = self._plans.pop(plan_id, None)
+        if plan is None: return False
+        del self._exercises[plan_id]
+        self.plans.remove(plan)
+        return True
+
+    def move_plan(self, plan_id, direction):
+        return self._move(self.plans, self._plans.get(plan_id), direction)
+
+    # --- Exercises ---
+
+    def add_exercise(self, plan_id, exercise):
+        plan = self._plans.get(plan_id)
+        if plan is None: return False
+        plan['exercises'].append(exercise)
+        self._exercises[plan_id][exercise['id']] = exercise
+        return True
+
+    def remove_exercise(self, plan_id, exercise_id):
+        exercise = self._exercises.get(plan_id, {}).pop(exercise_id, None)
+        if exercise is None: return False
+        self._plans[plan_id]['exercises'].remove(exercise)
+        return True
+
+    def move_exercise(self, plan_id, exercise_id, direction):
+        plan = self._plans.get(plan_id)
+        if plan is None: return False
+        return self._move(plan['exercises'], self.exercise(plan_id, exercise_id), direction)
+
+    def _move(self, items, item, direction):
+        if item is None: return False
+        idx = next(i for i, x in enumerate(items) if x is item)
+        new_idx = idx + direction
+        if not 0 <= new_idx < len(items): return False
+        items.insert(new_idx, items.pop(idx))
+        return True
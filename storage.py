@@ -0,0 +1,326 @@
+# storage.py
+import json
+import os
+import threading
+
+from history import SessionList
+
+# Number of journal records after which the journal is folded back into the snapshot
+JOURNAL_COMPACT_THRESHOLD = 200
+
+# Snapshot layout: one header line holding everything except the history, then one session per line
+SNAPSHOT_FORMAT = 2
+
+# Longest a history read waits for a write still on the writer thread
+PENDING_WRITE_TIMEOUT = 2.0
+
+
+# --- Journal Record Handlers ---
+# Each mutation of app.data is written as one small record. Replaying the
+# records in order on top of the last snapshot reproduces the in-memory state.
+
+def _find_plan(data, plan_id):
+    return next((p for p in data['plans'] if p['id'] == plan_id), None)
+
+def _apply_add_plan(data, rec):
+    data['plans'].append(rec['plan'])
+
+def _apply_rename_plan(data, rec):
+    plan = _find_plan(data, rec['plan_id'])
+    if plan: plan['name'] = rec['name']
+
+def _apply_reorder_plans(data, rec):
+    by_id = {p['id']: p for p in data['plans']}
+    ordered = [by_id.pop(p_id) for p_id in rec['order'] if p_id in by_id]
+    data['plans'] = ordered + list(by_id.values())
+
+def _apply_delete_plan(data, rec):
+    data['plans'] = [p for p in data['plans'] if p['id'] != rec['plan_id']]
+    sessions = data['workout_sessions']
+    if isinstance(sessions, SessionList):
+        sessions.remove_plan(rec['plan_id'])
+    else:
+        data['workout_sessions'] = [s for s in sessions if s.get('plan_id') != rec['plan_id']]
+
+def _apply_add_exercise(data, rec):
+    plan = _find_plan(data, rec['plan_id'])
+    if plan: plan['exercises'].append(rec['exercise'])
+
+def _apply_update_exercise(data, rec):
+    plan = _find_plan(data, rec['plan_id'])
+    if not plan: return
+    for i, ex in enumerate(plan['exercises']):
+        if ex['id'] == rec['exercise']['id']:
+            plan['exercises'][i] = rec['exercise']
+            break
+
+def _apply_delete_exercise(data, rec):
+    plan = _find_plan(data, rec['plan_id'])
+    if plan: plan['exercises'] = [e for e in plan['exercises'] if e['id'] != rec['exercise_id']]
+
+def _apply_reorder_exercises(data, rec):
+    plan = _find_plan(data, rec['plan_id'])
+    if not plan: return
+    by_id = {e['id']: e for e in plan['exercises']}
+    ordered = [by_id.pop(ex_id) for ex_id in rec['order'] if ex_id in by_id]
+    plan['exercises'] = ordered + list(by_id.values())
+
+def _apply_add_session(data, rec):
+    data['workout_sessions'].append(rec['session'])
+
+RECORD_HANDLERS = {
+    'add_plan': _apply_add_plan,
+    'rename_plan': _apply_rename_plan,
+    'reorder_plans': _apply_reorder_plans,
+    'delete_plan': _apply_delete_plan,
+    'add_exercise': _apply_add_exercise,
+    'update_exercise': _apply_update_exercise,
+    'delete_exercise': _apply_delete_exercise,
+    'reorder_exercises': _apply_reorder_exercises,
+    'add_session': _apply_add_session,
+}
+
+def apply_record(data, record):
+    handler = RECORD_HANDLERS.get(record.get('op'))
+    if handler:
+        handler(data, record)
+
+
+# --- Lazy Session History ---
+
+# Workout history backed by the session lines of a snapshot file. Nothing is parsed until the
+# list is first read; appends before that are kept aside so logging a session stays cheap.
+# The file stays open, so it can still be read after a newer snapshot replaces it on disk.
+class LazySessionList(SessionList):
+    def __init__(self, source, offset, count, last_date):
+        super().__init__()
+        self.loaded = False
+        self.tail = []
+        self._source = source
+        self._offset = offset
+        self._count = count
+        self._last_date = last_date
+        self._lock = threading.Lock()
+
+    def _read_lines(self):
+        self._source.seek(self._offset)
+        return [line for line in self._source.read().decode('utf-8').split('\n') if line]
+
+    def raw_lines(self):
+        with self._lock:
+            return self._read_lines()
+
+    def _materialize(self):
+        if self.loaded: return
+        with self._lock:
+            if self.loaded: return
+            # Snapshots are written in date order, so re-sorting here is a linear pass
+            self._reset([json.loads(line) for line in self._read_lines()] + self.tail)
+            self.tail = []
+            self.loaded = True
+
+    def __len__(self):
+        if self.loaded:
+            return list.__len__(self)
+        return self._count + len(self.tail)
+
+    def append(self, session):
+        if self.loaded:
+            SessionList.append(self, session)
+        else:
+            self.tail.append(session)
+
+    def last_date(self):
+        if self.loaded:
+            return SessionList.last_date(self)
+        dates = [s['date'] for s in self.tail]
+        if self._last_date:
+            dates.append(self._last_date)
+        return max(dates, default=None)
+
+def _materializing(name):
+    method = getattr(SessionList, name)
+    def wrapper(self, *args, **kwargs):
+        self._materialize()
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+# The mutators that would break the date order are left to raise, without loading anything
+for _name in ('__iter__', '__reversed__', '__getitem__', '__delitem__', '__contains__',
+              '__eq__', '__ne__', '__add__', '__repr__', 'insert', 'remove',
+              'pop', 'index', 'count', 'copy', 'clear'):
+    setattr(LazySessionList, _name, _materializing(_name))
+
+def last_session_date(sessions):
+    if isinstance(sessions, SessionList):
+        return sessions.last_date()
+    return max((s['date'] for s in sessions), default=None)
+
+# Sessions captured on the main thread for a background write. Still-unparsed history is
+# copied through as raw lines, everything else is serialized by the worker.
+class SessionCapture:
+    def __init__(self, sessions):
+        if isinstance(sessions, LazySessionList) and not sessions.loaded:
+            self._raw_source = sessions
+            self.items = list(sessions.tail)
+        else:
+            self._raw_source = None
+            self.items = list(sessions)
+        self.last_date = last_session_date(sessions)
+
+    def lines(self):
+        lines = self._raw_source.raw_lines() if self._raw_source is not None else []
+        return lines + [dumps_compact(s) for s in self.items]
+
+    def sessions(self):
+        # Parsed on the worker, so the main thread's history stays unloaded
+        lines = self._raw_source.raw_lines() if self._raw_source is not None else []
+        return [json.loads(line) for line in lines] + self.items
+
+# Writes a history backend hands to a writer thread (the autosaver's) through submit(func, *args).
+# Reads that must see them call settle() first, which only waits while one is still in flight.
+# Without a submit function the writes run inline, as in the import and the headless tools.
+class PendingWrites:
+    def __init__(self, submit=None):
+        self.submit = submit
+        self.count = 0
+        self._idle = threading.Condition()
+
+    def run(self, func, *args):
+        if self.submit is None:
+            func(*args)
+            return
+        with self._idle:
+            self.count += 1
+        self.submit(self._run, func, args)
+
+    def _run(self, func, args):
+        try:
+            func(*args)
+        finally:
+            with self._idle:
+                self.count -= 1
+                self._idle.notify_all()
+
+    def settle(self, timeout=PENDING_WRITE_TIMEOUT):
+        if not self.count: return
+        with self._idle:
+            self._idle.wait_for(lambda: not self.count, timeout)
+
+
+# --- Snapshot Helpers ---
+
+def dumps_compact(obj):
+    return json.dumps(obj, separators=(',', ':'))
+
+def write_atomic(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def compose_snapshot(header_fragments, session_lines, last_date):
+    # header_fragments: (key, serialized value) pairs for every section except the history
+    fields = [f'"format":{SNAPSHOT_FORMAT}']
+    fields += [f'{json.dumps(key)}:{fragment}' for key, fragment in header_fragments]
+    fields.append(f'"session_count":{len(session_lines)}')
+    fields.append(f'"last_workout_date":{json.dumps(last_date)}')
+    return '{' + ','.join(fields) + '}\n' + ''.join(line + '\n' for line in session_lines)
+
+def format_snapshot(data):
+    sessions = data.get('workout_sessions', [])
+    if not isinstance(sessions, SessionCapture):
+        sessions = SessionCapture(sessions)
+    header_fragments = [(key, dumps_compact(value)) for key, value in data.items() if key != 'workout_sessions']
+    return compose_snapshot(header_fragments, sessions.lines(), sessions.last_date)
+
+def load_snapshot(path):
+    # Plans and settings are parsed eagerly, the history is returned as a LazySessionList.
+    # Raises FileNotFoundError or json.JSONDecodeError like json.load.
+    f = open(path, 'rb')
+    first_line = f.readline()
+    try:
+        header = json.loads(first_line)
+    except json.JSONDecodeError:
+        header = None
+
+    if isinstance(header, dict) and header.get('format') == SNAPSHOT_FORMAT:
+        header.pop('format')
+        header['workout_sessions'] = LazySessionList(
+            f, f.tell(), header.pop('session_count', 0), header.pop('last_workout_date', None)
+        )
+        return header
+
+    # Legacy single-document data.json
+    try:
+        if isinstance(header, dict) and not f.read(1).strip():
+            return header
+        f.seek(0)
+        return json.load(f)
+    finally:
+        f.close()
+
+
+# Snapshot file plus an append-only journal of mutation records
+class JournalStore:
+    def __init__(self, snapshot_path, journal_path=None, compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + '.journal'
+        self.compact_threshold = compact_threshold
+        self.pending_records = 0
+        self.needs_upgrade = False
+        self._journal_file = None
+
+    def load(self, default_factory):
+        try:
+            data = load_snapshot(self.snapshot_path)
+            # Snapshots written before SNAPSHOT_FORMAT get rewritten so the next launch loads lazily
+            self.needs_upgrade = not isinstance(data.get('workout_sessions'), LazySessionList)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = default_factory()
+        data.setdefault('plans', [])
+        data.setdefault('workout_sessions', [])
+
+        self.pending_records = 0
+        torn = False
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        torn = True # Torn final write from a crash, everything before it is intact
+                        break
+                    apply_record(data, record)
+                    self.pending_records += 1
+        except FileNotFoundError:
+            pass
+
+        # Fold the intact records into a fresh snapshot so new appends never follow a torn line
+        if torn:
+            self.compact(data)
+        return data
+
+    def append_lines(self, lines):
+        # Lines are already serialized records, written with a single flush
+        if not lines: return
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a')
+        self._journal_file.write(''.join(line + '\n' for line in lines))
+        self._journal_file.flush()
+        self.pending_records += len(lines)
+
+    def compact(self, data):
+        write_atomic(self.snapshot_path, format_snapshot(data))
+        self.close()
+        # The snapshot now contains every journaled mutation, so the journal restarts empty
+        open(self.journal_path, 'w').close()
+        self.pending_records = 0
+
+    def close(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
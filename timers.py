@@ -0,0 +1,149 @@
+# timers.py
+import math
+import time
+
+from kivy.clock import Clock
+
+
+# Boot time keeps counting while the device sleeps, which plain monotonic time does not on
+# Android, so a rest timer started before the screen turned off still ends on time.
+if hasattr(time, 'CLOCK_BOOTTIME'):
+    def now():
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+else:
+    now = time.monotonic
+
+
+# Counts whole seconds up from its start; on_tick(seconds) runs each time the count changes
+class Stopwatch:
+    def __init__(self, service, on_tick):
+        self.service = service
+        self.on_tick = on_tick
+        self.start = now()
+        self.shown = None
+
+    def value(self, t):
+        return int(t - self.start)
+
+    def next_change(self, t):
+        return self.start + self.value(t) + 1
+
+    def cancel(self):
+        self.service.remove(self)
+
+
+# Counts whole seconds down to an absolute deadline. on_tick(seconds) runs each time the
+# count changes and on_done() once at the deadline. While paused the deadline is dropped and
+# only the time left is kept, so pausing, resuming and adding time are single subtractions.
+class Countdown:
+    def __init__(self, service, seconds, on_tick, on_done=None):
+        self.service = service
+        self.on_tick = on_tick
+        self.on_done = on_done
+        self.deadline = now() + seconds
+        self.paused_left = None
+        self.shown = None
+
+    @property
+    def paused(self):
+        return self.paused_left is not None
+
+    def left(self, t):
+        return self.paused_left if self.paused else self.deadline - t
+
+    def value(self, t):
+        return max(0, math.ceil(self.left(t)))
+
+    def next_change(self, t):
+        if self.paused:
+            return None
+        # The count drops to value - 1 once the time left reaches exactly that
+        return self.deadline - (self.value(t) - 1) if self.value(t) > 0 else self.deadline
+
+    def pause(self):
+        if self.paused: return
+        self.paused_left = max(0, self.deadline - now())
+        self.service.reschedule()
+
+    def resume(self):
+        if not self.paused: return
+        self.deadline = now() + self.paused_left
+        self.paused_left = None
+        self.service.reschedule()
+
+    def add(self, seconds):
+        if self.paused:
+            self.paused_left += seconds
+        else:
+            self.deadline += seconds
+        self.service.reschedule()
+
+    def cancel(self):
+        self.service.remove(self)
+
+
+# Drives every running timer from one Clock event, scheduled for the earliest moment any of
+# them shows a new value. Nothing is scheduled while no timer is running or all are paused.
+class TimerService:
+    def __init__(self):
+        self.timers = []
+        self._event = None
+        self._busy = False
+        self._again = False
+
+    def stopwatch(self, on_tick):
+        return self._add(Stopwatch(self, on_tick))
+
+    def countdown(self, seconds, on_tick, on_done=None):
+        return self._add(Countdown(self, seconds, on_tick, on_done))
+
+    def _add(self, timer):
+        self.timers.append(timer)
+        self.reschedule()
+        return timer
+
+    def remove(self, timer):
+        if timer in self.timers:
+            self.timers.remove(timer)
+            self.reschedule()
+
+    def reschedule(self, *args):
+        # Timer callbacks may start, change or cancel timers; those calls only ask for another
+        # pass here instead of booking a wakeup of their own
+        if self._busy:
+            self._again = True
+            return
+        self._busy = True
+        try:
+            wake = self._update()
+            while self._again:
+                self._again = False
+                wake = self._update()
+        finally:
+            self._busy = False
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if wake is not None:
+            self._event = Clock.schedule_once(self.reschedule, max(0, wake - now()))
+
+    def _update(self):
+        # Pushes changed values out, retires finished countdowns and returns the next wakeup
+        t = now()
+        wake = None
+        for timer in list(self.timers):
+            if timer not in self.timers: continue
+            value = timer.value(t)
+            if value != timer.shown:
+                timer.shown = value
+                timer.on_tick(value)
+                if timer not in self.timers: continue # Cancelled from its own tick
+            if isinstance(timer, Countdown) and value == 0:
+                self.timers.remove(timer)
+                if timer.on_done is not None:
+                    timer.on_done()
+                continue
+            change = timer.next_change(t)
+            if change is not None and (wake is None or change < wake):
+                wake = change
+        return wake
@@ -0,0 +1,44 @@
+# tracing.py
+import json
+import os
+import time
+from datetime import datetime
+
+# Set GYMAPP_RECORD_TRACE=1 to record how the app is used. Everything done up to the end of a
+# workout is appended as one JSON trace to TRACE_LOG in the app's data directory, where
+# benchmarks/replay.py can run it again against any dataset.
+RECORD_TRACE = os.environ.get('GYMAPP_RECORD_TRACE') == '1'
+TRACE_LOG = 'traces.jsonl'
+
+
+# A trace is a list of [ms since the trace began, step] or [ms, step, {arguments}] events,
+# one per screen action, with only what is needed to perform that action again.
+class TraceRecorder:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.origin = None
+        self.events = []
+
+    def event(self, step, **args):
+        if not self.enabled: return
+        if not self.events:
+            self.origin = time.monotonic()
+        at = round((time.monotonic() - self.origin) * 1000)
+        self.events.append([at, step, args] if args else [at, step])
+
+    def write(self, directory, **context):
+        # Ends the current trace; the next event starts a new one
+        if not self.enabled or not self.events: return None
+        path = os.path.join(directory, TRACE_LOG)
+        with open(path, 'a') as f:
+            f.write(json.dumps(dict(context, date=datetime.now().isoformat(timespec='seconds'),
+                                    events=self.events), separators=(',', ':')) + '\n')
+        self.events = []
+        return path
+
+def read_traces(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+trace = TraceRecorder(RECORD_TRACE)